@@ -0,0 +1,151 @@
+"""Measure the recall and the latency of the approximate TF-IDF search.
+
+The documents of the synthetic corpus are about one or two of `--topics`
+topics: half of their words are drawn from the words of their topics, and
+the other half from a background vocabulary whose frequencies follow Zipf's
+law. The queries are documents generated in the same way, which are not part
+of the corpus.
+
+The exact `Tfidf.get_scores` is the baseline. For each number of probes,
+`ApproximateTfidf` is compared with it by the recall@k, i.e. the fraction of
+the exact top `k` documents that the approximate search also ranks in its
+top `k`, and by the mean latency of a query.
+
+Usage:
+    python benchmarks/bench_ann.py [--documents N] [--words N] [--k N]
+        [--probes N [N ...]] [--dimensions N] [--output FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from findlike.parallel import count_tokens
+from findlike.utils import top_k
+from findlike.wrappers import ApproximateTfidf, Tfidf
+
+from bench_bm25 import SplitProcessor
+
+
+def make_documents(
+    n_documents: int,
+    n_words: int,
+    n_topics: int,
+    n_terms: int = 50000,
+    words_per_topic: int = 200,
+    seed: int = 0,
+) -> list[str]:
+    """Generate documents about one or two topics each."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, n_terms + 1)
+    weights /= weights.sum()
+    topics = rng.integers(n_terms, size=(n_topics, words_per_topic))
+    documents = []
+    for _ in range(n_documents):
+        about = rng.choice(n_topics, size=rng.integers(1, 3), replace=False)
+        length = rng.integers(n_words // 2, n_words * 3 // 2)
+        topical = rng.choice(topics[about].ravel(), size=length // 2)
+        background = rng.choice(n_terms, size=length - length // 2, p=weights)
+        words = np.concatenate([topical, background])
+        documents.append(" ".join(f"t{i}" for i in words))
+    return documents
+
+
+def fit(model, documents: list[str]) -> float:
+    """Fit a model on the term counts of the documents and return the time."""
+    vocabulary: dict[str, int] = {}
+    token_ids = [
+        np.array([vocabulary.setdefault(t, len(vocabulary)) for t in d.split()])
+        for d in documents
+    ]
+    counts = count_tokens(token_ids, len(vocabulary))
+    start = time.perf_counter()
+    model.fit_counts(counts, vocabulary)
+    return time.perf_counter() - start
+
+
+def search(model, queries: list[str], k: int) -> tuple[list[np.ndarray], float]:
+    """Return the top `k` documents of each query and the mean latency."""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append(top_k(model.get_scores(query), k, threshold=0.0))
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def recall(results: list[np.ndarray], expected: list[np.ndarray]) -> float:
+    """Return the mean fraction of the expected documents that were found."""
+    fractions = [
+        len(np.intersect1d(found, relevant)) / len(relevant)
+        for found, relevant in zip(results, expected)
+        if len(relevant)
+    ]
+    return float(np.mean(fractions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=128)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents + args.queries, args.words, args.topics)
+    documents, queries = documents[: args.documents], documents[args.documents :]
+
+    exact = Tfidf(processor=SplitProcessor())
+    fit_time = fit(exact, documents)
+    expected, exact_latency = search(exact, queries, args.k)
+    rows = [
+        {
+            "model": "tfidf",
+            "probes": None,
+            "fit_time": fit_time,
+            "recall": 1.0,
+            "latency": exact_latency,
+        }
+    ]
+
+    approximate = ApproximateTfidf(
+        processor=SplitProcessor(), n_components=args.dimensions
+    )
+    fit_time = fit(approximate, documents)
+    for probes in args.probes:
+        approximate.n_probes = probes
+        results, latency = search(approximate, queries, args.k)
+        rows.append(
+            {
+                "model": "tfidf-ann",
+                "probes": probes,
+                "fit_time": fit_time,
+                "recall": recall(results, expected),
+                "latency": latency,
+            }
+        )
+
+    print(
+        f"{args.documents} documents, {args.words} words, "
+        f"{len(approximate.centroids_)} clusters, recall@{args.k}"
+    )
+    print(f"  {'model':12s}{'probes':>8s}{'recall':>10s}{'latency':>14s}")
+    for row in rows:
+        print(
+            f"  {row['model']:12s}{row['probes'] or '-':>8}"
+            f"{row['recall']:10.3f}{row['latency'] * 1e3:11.2f} ms"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"parameters": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare the native sparse BM25 with rank_bm25's BM25Okapi.
+
+Both models are fitted on the same synthetic tokenized corpus, whose word
+frequencies follow Zipf's law, and score the same queries. The fit time
+includes building the term count matrix from the tokens.
+
+Usage:
+    python benchmarks/bench_bm25.py [--documents N [N ...]] [--words N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from findlike.parallel import count_tokens
+from findlike.wrappers import BM25
+
+
+class SplitProcessor:
+    """Processor whose tokens are the whitespace-separated words."""
+
+    def analyze(self, text: str) -> list[str]:
+        return text.split()
+
+
+def make_corpus(
+    n_documents: int, n_words: int, n_terms: int = 50000, seed: int = 0
+) -> list[list[str]]:
+    """Generate tokenized documents of random lengths around `n_words`."""
+    rng = np.random.default_rng(seed)
+    terms = np.array([f"t{i}" for i in range(n_terms)])
+    weights = 1 / np.arange(1, n_terms + 1)
+    weights /= weights.sum()
+    lengths = rng.integers(n_words // 2, n_words * 3 // 2, size=n_documents)
+    tokens = rng.choice(n_terms, size=lengths.sum(), p=weights)
+    return [t.tolist() for t in np.split(terms[tokens], np.cumsum(lengths)[:-1])]
+
+
+def fit_native(documents: list[list[str]]) -> BM25:
+    vocabulary: dict[str, int] = {}
+    token_ids = [
+        np.array([vocabulary.setdefault(t, len(vocabulary)) for t in d])
+        for d in documents
+    ]
+    model = BM25(processor=SplitProcessor())
+    model.fit_counts(count_tokens(token_ids, len(vocabulary)), vocabulary)
+    return model
+
+
+def timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--documents", type=int, nargs="+", default=[10000, 100000]
+    )
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    for n_documents in args.documents:
+        documents = make_corpus(n_documents, args.words)
+        rng = random.Random(0)
+        queries = [
+            rng.choice(documents)[: args.words // 2] for _ in range(args.queries)
+        ]
+
+        fit_old, old = timed(BM25Okapi, documents)
+        fit_new, new = timed(fit_native, documents)
+
+        start = time.perf_counter()
+        old_scores = [old.get_scores(q) for q in queries]
+        query_old = (time.perf_counter() - start) / len(queries)
+        start = time.perf_counter()
+        new_scores = [new.get_scores(" ".join(q)) for q in queries]
+        query_new = (time.perf_counter() - start) / len(queries)
+
+        assert np.allclose(old_scores, new_scores)
+        print(f"{n_documents} documents, {args.words} words on average")
+        print(
+            f"  fit:   rank_bm25 {fit_old:8.3f} s  native {fit_new:8.3f} s"
+            f"  ({fit_old / fit_new:.1f}x)"
+        )
+        print(
+            f"  query: rank_bm25 {query_old * 1e3:8.2f} ms native"
+            f" {query_new * 1e3:8.2f} ms ({query_old / query_new:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
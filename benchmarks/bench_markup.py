@@ -0,0 +1,88 @@
+"""Compare the Org-mode front-matter stripper with the former regex version.
+
+The former version removed the property drawers with the regular expression
+``:PROPERTIES:(.|\\n)*?:END:``, which steps through the alternation at every
+character and scans to the end of the file again for every drawer that has no
+``:END:``. A large Org file is generated with a property drawer and keywords
+under every heading, and both versions are timed on it, taking the best of
+`--repeat` runs. The pathological case of drawers missing their ``:END:`` is
+timed separately. The script exits with a non-zero status if the results of
+both versions differ.
+
+Usage:
+    python benchmarks/bench_markup.py [--headings N] [--unclosed N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+
+from findlike.markup import strip_org
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+
+def strip_org_regex(content: str) -> str:
+    """Former implementation of the Org-mode front-matter stripper."""
+    content = re.sub(r":PROPERTIES:(.|\n)*?:END:", "", content)
+    pattern = r"^\s*#\+[a-zA-Z0-9_]+.*?$"
+    content = re.sub(pattern, "", content, flags=re.MULTILINE)
+    return content.strip()
+
+
+def make_org(n_headings: int, unclosed: bool = False, seed: int = 0) -> str:
+    """Generate an Org file with a property drawer under every heading."""
+    rng = random.Random(seed)
+    parts = ["#+TITLE: Benchmark\n#+FILETAGS: :bench:\n"]
+    for i in range(n_headings):
+        parts.append(f"* Heading {i}\n:PROPERTIES:\n:ID: {i:08x}\n")
+        if not unclosed:
+            parts.append(":END:\n")
+        parts.append("#+BEGIN_QUOTE\n")
+        for _ in range(5):
+            parts.append(" ".join(rng.choices(WORDS, k=12)) + "\n")
+        parts.append("#+END_QUOTE\n\n")
+    return "".join(parts)
+
+
+def best_time(function, text: str, repeat: int) -> tuple[float, str]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--headings", type=int, default=20000)
+    parser.add_argument("--unclosed", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for label, text in [
+        ("large file", make_org(args.headings)),
+        ("unclosed drawers", make_org(args.unclosed, unclosed=True)),
+    ]:
+        regex_time, expected = best_time(strip_org_regex, text, args.repeat)
+        scan_time, result = best_time(strip_org, text, args.repeat)
+        same = result == expected
+        failed |= not same
+        print(
+            f"{label} ({len(text) / 2**20:.1f} MiB): "
+            f"regex {regex_time * 1e3:.1f} ms, scan {scan_time * 1e3:.1f} ms, "
+            f"{regex_time / scan_time:.1f}x"
+            + ("" if same else ", RESULTS DIFFER")
+        )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Time each stage of a search on a synthetic corpus written to disk.
+
+The corpus is generated deterministically from a seed, with the documents of
+`bench_preprocessing.make_corpus` spread over nested directories. Each stage
+is timed separately, taking the best of `--repeat` runs:
+
+- ``collect_paths``: scanning the directory tree.
+- ``load``: reading the files into a `Corpus`.
+- ``preprocess``: tokenizing the documents with `Processor.analyze`, starting
+  from an empty stem cache.
+- ``fit``, ``query`` and ``format``, for each algorithm: fitting the model,
+  scoring a reference document and formatting the results.
+
+The results are written as JSON, and can be compared with the results of
+another commit to find regressions.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--documents N] [--words N]
+        [--language LANGUAGE] [--algorithms NAME [NAME ...]]
+        [--output FILE] [--compare FILE] [--tolerance FRACTION]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from nltk.stem import SnowballStemmer
+from stop_words import get_stop_words
+
+from findlike.constants import ALGORITHM_CLASSES
+from findlike.format import BaseFormatter
+from findlike.preprocessing import Corpus, Processor
+from findlike.utils import collect_paths
+
+from bench_preprocessing import make_corpus
+
+
+def write_corpus(
+    directory: Path,
+    n_documents: int,
+    n_words: int,
+    language: str,
+    files_per_directory: int = 100,
+    seed: int = 0,
+):
+    """Write a synthetic corpus as Markdown files in nested directories."""
+    documents = make_corpus(n_documents, n_words, language, seed=seed)
+    for i, document in enumerate(documents):
+        folder = directory / f"{i // files_per_directory:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"note{i:06d}.md").write_text(document)
+
+
+def best_time(function, repeat: int) -> tuple[float, object]:
+    """Return the best time of `repeat` calls and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict[str, float]:
+    """Run the benchmarks and return the time of each stage in seconds."""
+    stopwords = get_stop_words(args.language)
+    stemmer = SnowballStemmer(args.language).stem
+
+    def make_processor():
+        return Processor(stopwords=stopwords, stemmer=stemmer)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        write_corpus(directory, args.documents, args.words, args.language)
+        results = {}
+
+        results["collect_paths"], paths = best_time(
+            lambda: collect_paths(directory, ["*.md"], recursive=True),
+            args.repeat,
+        )
+        results["load"], corpus = best_time(
+            lambda: Corpus(paths, min_chars=1), args.repeat
+        )
+        documents = corpus.documents_
+
+        def preprocess():
+            processor = make_processor()
+            return [processor.analyze(document) for document in documents]
+
+        results["preprocess"], _ = best_time(preprocess, args.repeat)
+
+        reference = documents[0]
+        for algorithm in args.algorithms:
+            model = ALGORITHM_CLASSES[algorithm](processor=make_processor())
+            results[f"{algorithm}.fit"], _ = best_time(
+                lambda: model.fit(documents), args.repeat
+            )
+            query_time, scores = best_time(
+                lambda: model.get_scores(reference), args.repeat * 10
+            )
+            results[f"{algorithm}.query"] = query_time
+            results[f"{algorithm}.format"], _ = best_time(
+                lambda: BaseFormatter(
+                    targets=corpus.paths_, scores=scores, show_scores=True
+                ).format(),
+                args.repeat * 10,
+            )
+    return results
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Print the ratio of each stage time to the baseline.
+
+    Returns:
+        list[str]: Stages slower than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for stage, seconds in results.items():
+        if stage not in baseline:
+            continue
+        ratio = seconds / baseline[stage]
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(stage)
+            flag = "  REGRESSION"
+        print(f"  {stage + ':':20s}{ratio:8.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--language", default="english")
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        choices=list(ALGORITHM_CLASSES),
+        default=["bm25", "tfidf"],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument(
+        "--compare", type=Path, help="JSON results of a previous run"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="slowdown above which a stage is a regression",
+    )
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{args.documents} documents, {args.words} words, {args.language}")
+    for stage, seconds in results.items():
+        print(f"  {stage + ':':20s}{seconds * 1e3:10.2f} ms")
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "documents": args.documents,
+            "words": args.words,
+            "language": args.language,
+            "repeat": args.repeat,
+        },
+        "seconds": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline["parameters"] != report["parameters"]:
+            print("warning: the baseline was run with other parameters")
+        print(f"compared with {baseline.get('commit') or args.compare}")
+        if compare(results, baseline["seconds"], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
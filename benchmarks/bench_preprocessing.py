@@ -0,0 +1,85 @@
+"""Compare the throughput of the regex-based and the fused preprocessing.
+
+The regex-based pipeline is `Processor.tokenizer(Processor.preprocessor(text))`,
+which removes stopwords from the whole text with a large alternation regex.
+The fused pipeline is `Processor.analyze(text)`.
+
+Usage:
+    python benchmarks/bench_preprocessing.py [--documents N] [--words N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from nltk.stem import SnowballStemmer
+from stop_words import get_stop_words
+
+from findlike.preprocessing import Processor
+
+
+def make_corpus(
+    n_documents: int, n_words: int, language: str, seed: int = 0
+) -> list[str]:
+    """Generate documents mixing stopwords, random words and URLs."""
+    rng = random.Random(seed)
+    stopwords = get_stop_words(language)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = [
+        "".join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(20000)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    documents = []
+    for _ in range(n_documents):
+        words = rng.choices(vocabulary, weights=weights, k=n_words)
+        for i in range(0, n_words, 3):
+            words[i] = rng.choice(stopwords)
+        for i in range(0, n_words, 200):
+            words[i] = f"https://example.com/{words[i]}"
+        documents.append(" ".join(words).capitalize() + ".")
+    return documents
+
+
+def throughput(function, documents: list[str], repeat: int) -> float:
+    """Return the best throughput in MB/s over `repeat` runs."""
+    size = sum(len(d.encode()) for d in documents) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for document in documents:
+            function(document)
+        best = min(best, time.perf_counter() - start)
+    return size / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=500)
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = make_corpus(args.documents, args.words, args.language)
+    processor = Processor(
+        stopwords=get_stop_words(args.language),
+        stemmer=SnowballStemmer(args.language).stem,
+    )
+
+    def regex_pipeline(text):
+        return processor.tokenizer(processor.preprocessor(text))
+
+    # Warm up the stem cache so that both pipelines are measured alike.
+    for document in documents:
+        processor.analyze(document)
+
+    old = throughput(regex_pipeline, documents, args.repeat)
+    new = throughput(processor.analyze, documents, args.repeat)
+    print(f"regex pipeline: {old:8.2f} MB/s")
+    print(f"fused pipeline: {new:8.2f} MB/s ({new / old:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measure the latency of short queries against a large corpus.
+
+The models are fitted on a synthetic tokenized corpus whose word frequencies
+follow Zipf's law. TF-IDF queries are also scored with scikit-learn's
+`cosine_similarity` on the document embeddings, which reads every document,
+as a baseline for the posting list layout used by `Tfidf`.
+
+Usage:
+    python benchmarks/bench_search.py [--documents N] [--query-words N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from findlike.parallel import count_tokens
+from findlike.wrappers import BM25, Tfidf
+
+from bench_bm25 import SplitProcessor, make_corpus
+
+
+def mean_time(function, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--query-words", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    documents = make_corpus(args.documents, args.words)
+    vocabulary: dict[str, int] = {}
+    token_ids = [
+        np.array([vocabulary.setdefault(t, len(vocabulary)) for t in d])
+        for d in documents
+    ]
+    counts = count_tokens(token_ids, len(vocabulary))
+    rng = np.random.default_rng(1)
+    queries = [
+        " ".join(rng.choice(documents[i], size=args.query_words))
+        for i in rng.integers(len(documents), size=args.queries)
+    ]
+
+    bm25 = BM25(SplitProcessor())
+    bm25.fit_counts(counts, vocabulary)
+    tfidf = Tfidf(SplitProcessor())
+    tfidf.fit_counts(counts, vocabulary)
+    tfidf.get_scores(queries[0])  # Build the posting lists.
+
+    def baseline(query):
+        embeddings = tfidf._transformer.transform(
+            tfidf._vectorizer.transform([query])
+        )
+        return cosine_similarity(embeddings, tfidf.target_embeddings_)
+
+    print(f"{args.documents} documents, {args.query_words}-word queries")
+    for label, function in [
+        ("bm25", bm25.get_scores),
+        ("tfidf", tfidf.get_scores),
+        ("tfidf (every document)", baseline),
+    ]:
+        print(f"  {label + ':':24s}{mean_time(function, queries) * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
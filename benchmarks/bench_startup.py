@@ -0,0 +1,84 @@
+"""Check the startup time of the command-line interface against a budget.
+
+The import time of `findlike.cli` is read from ``python -X importtime``, which
+also shows the slowest modules imported at startup, and the wall time of
+``findlike --help`` is measured in a fresh interpreter. Both are the best of
+`--repeat` runs. The script exits with a non-zero status if either exceeds its
+budget.
+
+Usage:
+    python benchmarks/bench_startup.py [--import-budget MS] [--help-budget MS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+IMPORTTIME_RE = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| (\s*)(\S+)")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Return the cumulative import time of the first two levels of imports.
+
+    The times are in microseconds.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for match in IMPORTTIME_RE.finditer(stderr):
+        _, cumulative, indent, name = match.groups()
+        if len(indent) <= 2:
+            times[name] = int(cumulative)
+    return times
+
+
+def help_time() -> float:
+    """Return the wall time of `findlike --help` in seconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "findlike", "--help"],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget", type=float, default=100.0)
+    parser.add_argument("--help-budget", type=float, default=250.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times("findlike.cli") for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times["findlike.cli"])
+    import_ms = best["findlike.cli"] / 1e3
+    help_ms = min(help_time() for _ in range(args.repeat)) * 1e3
+
+    print("slowest imports:")
+    slowest = sorted(best.items(), key=lambda item: -item[1])[: args.top]
+    for name, microseconds in slowest:
+        print(f"  {name + ':':32s}{microseconds / 1e3:8.1f} ms")
+    failed = False
+    for label, value, budget in [
+        ("import findlike.cli", import_ms, args.import_budget),
+        ("findlike --help", help_ms, args.help_budget),
+    ]:
+        status = "ok" if value <= budget else "OVER BUDGET"
+        failed |= value > budget
+        print(f"{label + ':':24s}{value:8.1f} ms (budget {budget:.0f} ms) {status}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Iterable
 from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
 
 import click
-from nltk.stem import SnowballStemmer
-from stop_words import get_stop_words
 
-from .constants import ALGORITHM_CLASSES, FORMATTER_CLASSES, TEXT_FILE_EXT
-from .preprocessing import (
-    Corpus,
-    Processor,
+from . import profiling
+from .constants import (
+    ALGORITHM_CLASSES,
+    FORMATTER_CLASSES,
+    SECTION_MODES,
+    TEXT_FILE_EXT,
 )
-from .utils import collect_paths
+
+if TYPE_CHECKING:
+    from .index import Index
+    from .preprocessing import Corpus, Processor
+    from .sections import FileSections, Section
+
+# Number of sources scored at once in batch mode.
+BATCH_SIZE = 256
 
 
 @click.command()
@@ -49,6 +59,21 @@ from .utils import collect_paths
     help="recursive search",
     required=False,
 )
+@click.option(
+    "--exclude",
+    "-e",
+    multiple=True,
+    default=[".git", "node_modules"],
+    show_default=True,
+    help="glob pattern of files and directories to skip (can be repeated)",
+    required=False,
+)
+@click.option(
+    "--gitignore",
+    is_flag=True,
+    help="skip the files and directories ignored by .gitignore files",
+    required=False,
+)
 @click.option(
     "--algorithm",
     "-a",
@@ -58,6 +83,30 @@ from .utils import collect_paths
     help="text similarity algorithm",
     required=False,
 )
+@click.option(
+    "--hash-buckets",
+    type=click.IntRange(min=1),
+    default=2**20,
+    show_default=True,
+    help="number of hash buckets of the tfidf-hashed algorithm",
+    required=False,
+)
+@click.option(
+    "--ann-dimensions",
+    type=click.IntRange(min=1),
+    default=128,
+    show_default=True,
+    help="number of dimensions used to cluster documents with tfidf-ann",
+    required=False,
+)
+@click.option(
+    "--ann-probes",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="number of clusters searched for each reference with tfidf-ann",
+    required=False,
+)
 @click.option(
     "--language",
     "-l",
@@ -171,11 +220,160 @@ from .utils import collect_paths
     show_default=True,
     help="regex pattern to remove URLs from text",
 )
+@click.option(
+    "--index-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="directory where a persistent index of the scanned files is kept",
+    required=False,
+)
+@click.option(
+    "--socket",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Unix socket of a findlike server to query, falling back to "
+    "in-process scoring if no server is running",
+    required=False,
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    help="keep the fitted model in memory and answer queries on --socket",
+    required=False,
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="keep running and print the results again whenever files change",
+    required=False,
+)
+@click.option(
+    "--watch-interval",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="seconds between checks for changed files in --watch mode",
+    required=False,
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="number of processes used to tokenize the documents (0 for all CPUs)",
+    required=False,
+)
+@click.option(
+    "--read-workers",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="number of threads reading files concurrently",
+    required=False,
+)
+@click.option(
+    "--mmap-min-size",
+    type=click.IntRange(min=0),
+    default=None,
+    help="memory-map files of at least this many bytes instead of reading them",
+    required=False,
+)
+@click.option(
+    "--max-file-size",
+    type=click.IntRange(min=0),
+    default=None,
+    help="skip files larger than this many bytes",
+    required=False,
+)
+@click.option(
+    "--encoding",
+    "encodings",
+    type=str,
+    multiple=True,
+    help="encoding to try when a file cannot be decoded with the locale "
+    "encoding (can be used multiple times)",
+    required=False,
+)
+@click.option(
+    "--sections",
+    type=click.Choice(SECTION_MODES),
+    default=None,
+    help="score each section of the documents separately and rank the files "
+    "by their best section: split at Org/Markdown headings or in windows of "
+    "words",
+    required=False,
+)
+@click.option(
+    "--window-size",
+    type=click.IntRange(min=1),
+    default=200,
+    show_default=True,
+    help="number of words of each window with --sections window",
+    required=False,
+)
+@click.option(
+    "--window-overlap",
+    type=click.IntRange(min=0),
+    default=50,
+    show_default=True,
+    help="number of words shared by consecutive windows with --sections window",
+    required=False,
+)
+@click.option(
+    "--profile",
+    "--stats",
+    "profile",
+    is_flag=True,
+    help="print the time, memory and counters of each stage to stderr",
+    required=False,
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(profiling.PROFILE_FORMATS),
+    default="text",
+    show_default=True,
+    help="format of the --profile statistics",
+    required=False,
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="reduce the documents to term counts as they are read, instead of "
+    "keeping their text in memory",
+    required=False,
+)
+@click.option(
+    "--batch-file",
+    type=click.File(),
+    default=None,
+    help="file with one reference file path or query per line, whose results "
+    "are printed as JSON Lines",
+    required=False,
+)
+@click.option(
+    "--all-pairs",
+    is_flag=True,
+    help="use every scanned document as a reference, printing JSON Lines",
+    required=False,
+)
+@click.option(
+    "--graph",
+    "graph_output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="write the --max-results most similar documents of every scanned "
+    "document above --threshold to a .csv, .jsonl or .npz file",
+    required=False,
+)
 def cli(
     reference_file,
     directory,
     filename_pattern,
     algorithm,
+    hash_buckets,
+    ann_dimensions,
+    ann_probes,
     max_results,
     language,
     min_chars,
@@ -183,6 +381,8 @@ def cli(
     heading,
     show_scores,
     recursive,
+    exclude,
+    gitignore,
     hide_reference,
     query,
     format,
@@ -192,6 +392,25 @@ def cli(
     precision,
     word_re,
     url_re,
+    index_dir,
+    socket,
+    serve,
+    watch,
+    watch_interval,
+    jobs,
+    read_workers,
+    mmap_min_size,
+    max_file_size,
+    encodings,
+    sections,
+    window_size,
+    window_overlap,
+    profile,
+    profile_format,
+    stream,
+    batch_file,
+    all_pairs,
+    graph_output,
 ):
     """'findlike' is a program that scans a given directory and returns the most
     similar documents in relation to REFERENCE_FILE or --query QUERY.
@@ -205,28 +424,124 @@ def cli(
     $ findlike -q "There is only one good, knowledge, and one evil, ignorance"
     """
 
-    # Put together the list of documents to be analyzed.
+    if profile:
+        profiler = profiling.enable()
+
+        def print_profile():
+            profiling.disable()
+            click.echo(profiler.report(profile_format), err=True)
+
+        click.get_current_context().call_on_close(print_profile)
+
     directory_path = Path(directory)
     extensions: list[str] = [filename_pattern] if filename_pattern else TEXT_FILE_EXT
-    document_paths = collect_paths(
-        directory=directory_path, extensions=extensions, recursive=recursive
-    )
-
-    # Create a corpus with the collected documents.
-    corpus = Corpus(
-        paths=document_paths,
-        min_chars=min_chars,
-        ignore_front_matter=ignore_front_matter,
-    )
-    if reference_file:
-        corpus.add_from_file(path=Path(reference_file), is_reference=True)
-    elif query:
-        corpus.add_from_query(query=query)
-    else:
+    settings = {
+        "language": language,
+        "word_re": word_re,
+        "url_re": url_re,
+        "min_chars": min_chars,
+        "ignore_front_matter": ignore_front_matter,
+        "max_file_size": max_file_size,
+        "encodings": list(encodings),
+        "sections": sections,
+        "window_size": window_size,
+        "window_overlap": window_overlap,
+        # Indexes of hashed term counts have no vocabulary.
+        "hash_buckets": hash_buckets if algorithm == "tfidf-hashed" else None,
+    }
+    formatter_options = {
+        "max_results": max_results,
+        "show_scores": show_scores,
+        "hide_reference": hide_reference,
+        "prefix": prefix,
+        "heading": heading,
+        "threshold": threshold,
+        "absolute_paths": absolute_paths,
+        "is_query": bool(query),
+        "precision": precision,
+    }
+    if serve and not socket:
+        raise click.UsageError("--serve requires --socket.")
+    batch = bool(batch_file or all_pairs or graph_output)
+    if socket and (watch or batch):
+        raise click.UsageError(
+            "--socket and --serve cannot be combined with --watch, --batch-file, "
+            "--all-pairs or --graph."
+        )
+    if not (serve or batch) and not reference_file and not query:
         raise click.UsageError("Neither REFERENCE_FILE nor --query QUERY was provided.")
+    if sections and (graph_output or all_pairs):
+        raise click.UsageError(
+            "--sections cannot be combined with --graph or --all-pairs."
+        )
+    if sections == "window" and window_overlap >= window_size:
+        raise click.UsageError("--window-overlap must be smaller than --window-size.")
+    if graph_output:
+        from .graph import GRAPH_FORMATS
+        from .wrappers import Tfidf
+
+        if not issubclass(ALGORITHM_CLASSES[algorithm], Tfidf):
+            raise click.UsageError("--graph is only supported by TF-IDF algorithms.")
+        if Path(graph_output).suffix.lower() not in GRAPH_FORMATS:
+            raise click.UsageError(
+                f"--graph must be one of the following file types: {GRAPH_FORMATS}."
+            )
+
+    # Options that a server must have been started with to answer a search.
+    server_settings = {
+        **settings,
+        "directory": str(directory_path.resolve()),
+        "extensions": extensions,
+        "recursive": recursive,
+        "exclude": list(exclude),
+        "gitignore": gitignore,
+        "algorithm": algorithm,
+        "hash_buckets": hash_buckets,
+        "ann_dimensions": ann_dimensions,
+        "ann_probes": ann_probes,
+    }
+    if socket and not serve:
+        output = _request_search(
+            Path(socket),
+            {
+                "settings": server_settings,
+                "reference_file": (
+                    str(Path(reference_file).resolve()) if reference_file else None
+                ),
+                "query": query,
+                "directory": str(
+                    directory_path.resolve() if absolute_paths else directory_path
+                ),
+                "format": format,
+                "formatter": formatter_options,
+            },
+        )
+        if output is not None:
+            print(output)
+            return
+
+    # Imported here so that --help, --version and the searches answered by a
+    # server do not wait for NumPy and SciPy to load.
+    from stop_words import get_stop_words
+
+    from .index import STEMS_FILE, Index
+    from .preprocessing import Corpus, Processor, SnowballStemmer
+    from .sections import FileSections, make_splitter
+    from .utils import collect_paths, iter_paths
+
+    # Put together the list of documents to be analyzed.
+    scan_options = {
+        "directory": directory_path,
+        "extensions": extensions,
+        "recursive": recursive,
+        "exclude": exclude,
+        "gitignore": gitignore,
+    }
+    with profiling.stage("scan"):
+        document_paths = (iter_paths if stream else collect_paths)(**scan_options)
 
     # Set up the documents pre-processor.
-    stemmer = SnowballStemmer(language).stem
+    stemmer = SnowballStemmer(language)
     processor = Processor(
         stopwords=get_stop_words(language=language),
         stemmer=stemmer,
@@ -235,23 +550,469 @@ def cli(
     )
 
     # Set up the similarity model.
-    model = ALGORITHM_CLASSES[algorithm](processor=processor)
-    model.fit(corpus.documents_)  # Add reference to avoid zero division
-    scores = model.get_scores(source=corpus.reference_)
+    model = _make_model(
+        algorithm,
+        processor,
+        jobs=jobs,
+        hash_buckets=hash_buckets,
+        ann_dimensions=ann_dimensions,
+        ann_probes=ann_probes,
+    )
+    corpus_options = {
+        "min_chars": min_chars,
+        "ignore_front_matter": ignore_front_matter,
+        "read_workers": read_workers,
+        "mmap_min_size": mmap_min_size,
+        "max_size": max_file_size,
+        "encodings": list(encodings),
+        "splitter": (
+            make_splitter(sections, size=window_size, overlap=window_overlap)
+            if sections
+            else None
+        ),
+    }
+    reader = Corpus(paths=[], **corpus_options)
+    index_options = {
+        "settings": settings,
+        "jobs": jobs,
+        "n_features": settings["hash_buckets"],
+    }
+    index = None
+    if index_dir:
+        # Load the term counts from the index, updating the files that changed.
+        with profiling.stage("index"):
+            index = Index(directory=Path(index_dir), **index_options)
+            stem_cache = processor.stem_cache
+            if index.load() and stem_cache is not None:
+                stem_cache.load(Path(index_dir) / STEMS_FILE)
+            if index.update(document_paths, corpus=reader, processor=processor):
+                _save_index(index, processor)
+    elif stream or watch:
+        # Only the term counts of the documents are kept in memory, and
+        # updated as files change in --watch mode.
+        with profiling.stage("index"):
+            index = Index(directory=None, **index_options)
+            index.update(document_paths, corpus=reader, processor=processor)
+
+    if serve or batch:
+        # The graph and --all-pairs need the document embeddings.
+        saved_model = not (graph_output or all_pairs)
+        targets, lines = _fit_documents(
+            model,
+            index,
+            document_paths,
+            corpus_options,
+            directory_path,
+            name=algorithm if saved_model else None,
+        )
+        file_sections = FileSections(targets, lines) if sections else None
+        if graph_output:
+            _write_graph(
+                model,
+                targets,
+                Path(graph_output),
+                max_neighbors=max_results,
+                threshold=threshold,
+                absolute_paths=absolute_paths,
+                precision=precision,
+            )
+        elif batch:
+            _print_batch(
+                model,
+                targets,
+                file_sections,
+                reader,
+                batch_file=batch_file,
+                all_pairs=all_pairs,
+                formatter_options=formatter_options,
+            )
+        else:
+            _serve(
+                Path(socket),
+                model,
+                targets,
+                reader,
+                directory_path,
+                settings=server_settings,
+                file_sections=file_sections,
+            )
+        return
+
+    reference_sections = None
+    if index is not None:
+        source = _read_reference(reader, reference_file) if reference_file else query
+        if reference_file:
+            reference_sections = reader.read_sections(Path(reference_file))
+        scores = _score_index(
+            model, index, processor, source, algorithm, reference_sections
+        )
+        targets, lines = index.paths_, index.lines_
+    else:
+        # Create a corpus with the collected documents.
+        with profiling.stage("read"):
+            corpus = Corpus(paths=document_paths, **corpus_options)
+            if reference_file:
+                corpus.add_from_file(path=Path(reference_file), is_reference=True)
+                if corpus.reference_ is None:
+                    raise _unreadable_reference()
+            else:
+                corpus.add_from_query(query=query)
+        with profiling.stage("fit"):
+            model.fit(corpus.documents_)  # Add reference to avoid zero division
+        with profiling.stage("score"):
+            scores = model.get_scores(source=corpus.reference_)
+        targets, lines = corpus.paths_, corpus.lines_
 
     # Format and print results.
-    formatter = FORMATTER_CLASSES[format](
-        targets=corpus.paths_,
-        scores=scores,
-        max_results=max_results,
-        show_scores=show_scores,
-        hide_reference=hide_reference,
-        prefix=prefix,
-        heading=heading,
-        threshold=threshold,
-        absolute_paths=absolute_paths,
-        is_query=bool(query),
-        precision=precision,
+    with profiling.stage("format"):
+        file_sections = FileSections(targets, lines) if sections else None
+        formatter = FORMATTER_CLASSES[format](
+            **_results(scores, targets, file_sections), **formatter_options
+        )
+        formatted_results = formatter.format()
+    print(formatted_results, flush=True)
+
+    if watch:
+        _watch(
+            model,
+            index,
+            processor,
+            reader,
+            scan_options,
+            reference_file=reference_file,
+            source=source,
+            reference_sections=reference_sections,
+            algorithm=algorithm,
+            sections=bool(sections),
+            format=format,
+            formatter_options=formatter_options,
+            save=bool(index_dir),
+            interval=watch_interval,
+        )
+
+
+def _request_search(socket_path: Path, payload: dict) -> str | None:
+    """Send a search to a server started with --serve.
+
+    Returns:
+        str | None: The formatted results, or None if there is no server or
+            it could not answer the search (e.g. it was started with other
+            settings), in which case the client searches by itself.
+    """
+    # Imported here because Unix sockets are not available everywhere.
+    from .server import request
+
+    response = request(socket_path, payload)
+    if response is None:
+        return None
+    return response.get("output")
+
+
+def _make_model(
+    algorithm: str,
+    processor: Processor,
+    jobs: int,
+    hash_buckets: int,
+    ann_dimensions: int,
+    ann_probes: int,
+):
+    """Create the similarity model of an algorithm with its options."""
+    from .wrappers import ApproximateTfidf, HashedTfidf
+
+    model_class = ALGORITHM_CLASSES[algorithm]
+    model_options = {"jobs": jobs}
+    if issubclass(model_class, HashedTfidf):
+        model_options["n_features"] = hash_buckets
+    if issubclass(model_class, ApproximateTfidf):
+        model_options["n_components"] = ann_dimensions
+        model_options["n_probes"] = ann_probes
+    return model_class(processor=processor, **model_options)
+
+
+def _fit_documents(
+    model,
+    index: Index | None,
+    paths: Iterable[Path],
+    corpus_options: dict,
+    directory: Path,
+    name: str | None = None,
+) -> tuple[list[Path], list[tuple[int, int]]]:
+    """Fit the model on the scanned documents alone, without a reference.
+
+    The term counts of the `index` are used if there is one, and the
+    documents are read from `paths` otherwise.
+
+    Returns:
+        tuple[list[Path], list[tuple[int, int]]]: Paths and line ranges of
+            the documents the model was fitted on.
+
+    Raises:
+        click.UsageError: If no documents were found.
+    """
+    from .preprocessing import Corpus
+
+    if index is not None:
+        targets, lines = index.paths_, index.lines_
+    else:
+        with profiling.stage("read"):
+            corpus = Corpus(paths=paths, **corpus_options)
+        targets, lines = corpus.paths_, corpus.lines_
+    # Unlike a single search, there is no reference to fit the model on.
+    if not targets:
+        raise click.UsageError(f"No documents were found in {directory}.")
+    if index is not None:
+        _fit_index(model, index, name)
+    else:
+        with profiling.stage("fit"):
+            model.fit(corpus.documents_)
+    return targets, lines
+
+
+def _write_graph(
+    model,
+    targets: list[Path],
+    output: Path,
+    max_neighbors: int,
+    threshold: float,
+    absolute_paths: bool,
+    precision: int,
+):
+    """Write the most similar documents of every document (see --graph)."""
+    from .graph import similarity_graph, write_graph
+
+    graph = similarity_graph(
+        model.target_embeddings_, max_neighbors=max_neighbors, threshold=threshold
     )
-    formatted_results = formatter.format()
-    print(formatted_results)
+    if absolute_paths:
+        targets = [target.resolve() for target in targets]
+    with profiling.stage("graph"):
+        write_graph(graph, paths=targets, output=output, precision=precision)
+
+
+def _print_batch(
+    model,
+    targets: list[Path],
+    file_sections: FileSections | None,
+    reader: Corpus,
+    batch_file: TextIO | None,
+    all_pairs: bool,
+    formatter_options: dict,
+):
+    """Print the results of every source as JSON Lines.
+
+    The sources are the lines of the `batch_file`, or every document if
+    `all_pairs` is set.
+    """
+    from .format import JsonFormatter
+
+    if all_pairs:
+        labels = [{"reference": str(target)} for target in targets]
+        sources = list(range(len(targets)))
+        score_batch = model.get_document_scores
+    else:
+        labels, sources = _read_batch_file(batch_file, reader)
+        score_batch = model.get_scores_batch
+    with profiling.stage("score"):
+        for start in range(0, len(sources), BATCH_SIZE):
+            block = sources[start : start + BATCH_SIZE]
+            scores_block = score_batch([s if s is not None else "" for s in block])
+            for label, source, scores in zip(labels[start:], block, scores_block):
+                options = {**formatter_options, "is_query": "query" in label}
+                formatter = JsonFormatter(
+                    **_results(scores, targets, file_sections), **options
+                )
+                results = formatter.entries() if source is not None else []
+                print(json.dumps({**label, "results": results}), flush=True)
+
+
+def _serve(
+    socket_path: Path,
+    model,
+    targets: list[Path],
+    reader: Corpus,
+    directory: Path,
+    settings: dict,
+    file_sections: FileSections | None,
+):
+    """Answer the searches sent to `socket_path` until interrupted."""
+    from .server import Server
+
+    server = Server(
+        socket_path,
+        model=model,
+        targets=targets,
+        corpus=reader,
+        directory=directory,
+        settings=settings,
+        sections=file_sections,
+    )
+    click.echo(f"Listening on {socket_path}", err=True)
+    server.serve()
+
+
+def _watch(
+    model,
+    index: Index,
+    processor: Processor,
+    reader: Corpus,
+    scan_options: dict,
+    reference_file: str | None,
+    source: str,
+    reference_sections: list[Section] | None,
+    algorithm: str,
+    sections: bool,
+    format: str,
+    formatter_options: dict,
+    save: bool,
+    interval: float,
+):
+    """Print the results again whenever the scanned files change.
+
+    Only the changed files are read again. The model is then refitted on the
+    term counts in memory, because adding or removing a document changes the
+    IDF of every term. If `save` is set, the index is written once, when
+    interrupted, instead of after every change.
+    """
+    from .sections import FileSections
+    from .utils import collect_paths
+    from .watch import Watcher
+
+    watcher = Watcher(
+        scan=lambda: collect_paths(**scan_options),
+        extra_paths=[Path(reference_file)] if reference_file else [],
+        directories=[scan_options["directory"]],
+        interval=interval,
+    )
+    try:
+        for changed_paths in watcher.changes():
+            index.update(
+                changed_paths, corpus=reader, processor=processor, partial=True
+            )
+            if reference_file:
+                source = reader.read(Path(reference_file))
+                if source is None:
+                    # E.g. an editor truncated it while saving.
+                    continue
+                reference_sections = reader.read_sections(Path(reference_file))
+            scores = _score_index(
+                model, index, processor, source, algorithm, reference_sections
+            )
+            file_sections = (
+                FileSections(index.paths_, index.lines_) if sections else None
+            )
+            formatter = FORMATTER_CLASSES[format](
+                **_results(scores, index.paths_, file_sections), **formatter_options
+            )
+            print(formatter.format(), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if save and not index.generation_:
+            _save_index(index, processor)
+
+
+def _unreadable_reference() -> click.BadParameter:
+    return click.BadParameter(
+        "could not be read as text (missing, binary, too large or too short).",
+        param_hint="REFERENCE_FILE",
+    )
+
+
+def _read_reference(reader: Corpus, reference_file: str) -> str:
+    """Read the reference file, failing if it is not a valid document."""
+    source = reader.read(Path(reference_file))
+    if source is None:
+        raise _unreadable_reference()
+    return source
+
+
+def _read_batch_file(
+    batch_file: TextIO, reader: Corpus
+) -> tuple[list[dict[str, str]], list[str | None]]:
+    """Read the sources listed in a batch file.
+
+    Each non-empty line is either the path of an existing file, which is used
+    as a reference file, or a query.
+
+    Returns:
+        tuple[list[dict], list[str | None]]: Labels identifying each source in
+            the output, and the source texts (None for unreadable files).
+    """
+    labels = []
+    sources = []
+    for line in batch_file:
+        line = line.strip()
+        if not line:
+            continue
+        path = Path(line)
+        if path.is_file():
+            labels.append({"reference": line})
+            sources.append(reader.read(path))
+        else:
+            labels.append({"query": line})
+            sources.append(line)
+    return labels, sources
+
+
+def _results(scores, targets: list[Path], file_sections: FileSections | None) -> dict:
+    """Return the formatter arguments for the scores of the documents.
+
+    If the documents are sections of files, the files are scored by their
+    best section instead.
+    """
+    if file_sections is None:
+        return {"targets": targets, "scores": scores}
+    scores, lines = file_sections.max_pool(scores)
+    return {"targets": file_sections.files, "scores": scores, "lines": lines}
+
+
+def _save_index(index: Index, processor: Processor):
+    """Save the index, with the stems memoized while it was updated."""
+    from .index import STEMS_FILE
+
+    index.save()
+    if processor.stem_cache is not None:
+        processor.stem_cache.save(index.directory / STEMS_FILE)
+
+
+def _fit_index(model, index: Index, name: str | None = None):
+    """Fit the model on the indexed term counts.
+
+    If the index is saved, TF-IDF models are saved with it under `name`,
+    and memory-mapped by the next runs instead of being fitted again, for as
+    long as the index does not change.
+    """
+    from .wrappers import Tfidf
+
+    # An index that changed since it was saved has no saved models.
+    saved = name and index.generation_
+    directory = index.model_directory(name) if saved else None
+    with profiling.stage("fit"):
+        if directory is None or not isinstance(model, Tfidf):
+            model.fit_counts(index.counts_, index.vocabulary_)
+        elif not model.load(directory, index.vocabulary_, tag=index.generation_):
+            model.fit_counts(index.counts_, index.vocabulary_)
+            model.save(directory, tag=index.generation_)
+
+
+def _score_index(
+    model,
+    index: Index,
+    processor: Processor,
+    source: str,
+    name: str | None = None,
+    sections: list[Section] | None = None,
+):
+    """Fit the model on the indexed term counts and score `source`.
+
+    If `source` is the content of a reference file, its `sections` as the
+    index reads them tell whether the file is already indexed.
+    """
+    if index.contains(source if sections is None else sections):
+        _fit_index(model, index, name)
+    else:
+        with profiling.stage("fit"):
+            # Add reference to avoid zero division
+            model.fit_counts(*index.with_document(source, processor=processor))
+    with profiling.stage("score"):
+        return model.get_scores(source=source)
@@ -1,9 +1,53 @@
-from .format import BaseFormatter, JsonFormatter
-from .wrappers import BM25, Tfidf
+from __future__ import annotations
 
-FORMATTER_CLASSES = {"plain": BaseFormatter, "json": JsonFormatter}
+import importlib
+from collections.abc import Iterator, Mapping
 
-ALGORITHM_CLASSES = {"bm25": BM25, "tfidf": Tfidf}
+
+class LazyClasses(Mapping):
+    """Mapping of names to classes that imports their module on first access.
+
+    Listing the names (e.g. for the choices of a command-line option) does
+    not import the module, which keeps heavy dependencies out of the startup.
+
+    Args:
+        module (str): Module defining the classes, relative to this package.
+        names (dict[str, str]): Mapping of names to class names.
+    """
+
+    def __init__(self, module: str, names: dict[str, str]):
+        self.module = module
+        self.names = names
+
+    def __getitem__(self, key: str) -> type:
+        class_name = self.names[key]
+        return getattr(importlib.import_module(self.module, __package__), class_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+FORMATTER_CLASSES = LazyClasses(
+    ".format", {"plain": "BaseFormatter", "json": "JsonFormatter"}
+)
+
+ALGORITHM_CLASSES = LazyClasses(
+    ".wrappers",
+    {
+        "bm25": "BM25",
+        "bm25l": "BM25L",
+        "bm25plus": "BM25Plus",
+        "tfidf": "Tfidf",
+        "tfidf-hashed": "HashedTfidf",
+        "tfidf-ann": "ApproximateTfidf",
+    },
+)
+
+# Ways of splitting documents into sections (see `sections.make_splitter`).
+SECTION_MODES = ["headings", "window"]
 
 TEXT_FILE_EXT = [
     "*.ada",
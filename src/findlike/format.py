@@ -3,6 +3,10 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import numpy as np
+
+from .utils import top_k
+
 
 class BaseFormatter:
     """Base class for formatting similarity search results.
@@ -13,7 +17,7 @@ class BaseFormatter:
 
     Args:
         targets (list[Path]): List of paths to the target files.
-        scores (list[float]): List of similarity scores corresponding to the targets.
+        scores (list[float] | np.ndarray): Similarity scores corresponding to the targets.
         max_results (int, optional): Maximum number of results to display. Defaults to 10.
         show_scores (bool, optional): Whether to show the similarity scores. Defaults to False.
         hide_reference (bool, optional): Whether to hide the reference file (if present). Defaults to False.
@@ -23,6 +27,8 @@ class BaseFormatter:
         absolute_paths (bool, optional): Whether to show absolute paths. Defaults to False.
         is_query (bool, optional): Indicates if the search was by a query string (as opposed to a reference file). Defaults to False.
         precision (int, optional): Number of decimal places to round the scores to. Defaults to 2.
+        lines (list[tuple[int, int]], optional): Line range of the best section of each target,
+            if the documents were split into sections. Defaults to None.
 
     The `format` method returns the formatted output string.
     """
@@ -30,7 +36,7 @@ class BaseFormatter:
     def __init__(
         self,
         targets: list[Path],
-        scores: list[float],
+        scores: list[float] | np.ndarray,
         max_results: int = 10,
         show_scores: bool = False,
         hide_reference: bool = False,
@@ -40,6 +46,7 @@ class BaseFormatter:
         absolute_paths: bool = False,
         is_query: bool = False,
         precision: int = 2,
+        lines: list[tuple[int, int]] | None = None,
     ):
         self.targets = targets
         self.scores = scores
@@ -52,45 +59,38 @@ class BaseFormatter:
         self.absolute_paths = absolute_paths
         self.is_query = is_query
         self.precision = precision
+        self.lines = lines
 
         self._scores_targets: list[tuple[float, Path]]
-        self._format_targets()._zip_pairs()._filter_pairs()
-
-    def _zip_pairs(self):
-        self._scores_targets = list(zip(self.scores, self.targets))
-        return self
+        self._lines: list[tuple[int, int]] | None = None
+        self._filter_pairs()
 
     def _filter_pairs(self):
         """Remove reference doc if needed and limit list to max number of results."""
 
-        # Sort pairs according to distance (descending).
-        self._scores_targets = sorted(
-            self._scores_targets, key=lambda x: x[0], reverse=True
-        )
-
-        # Remove entries whose score are below the threshold.
-        self._scores_targets = [
-            x for x in self._scores_targets if x[0] >= self.threshold
-        ]
+        # Select the best entries at or above the threshold, sorted by score
+        # (descending), disregarding the first entry if `hide_reference` flag
+        # was passed.
+        start_pos = int(self.hide_reference and not self.is_query)
+        # Scores beyond the targets (e.g. an appended reference) are ignored.
+        scores = np.asarray(self.scores, dtype=float)[: len(self.targets)]
+        indices = top_k(scores, start_pos + self.max_results, self.threshold)
 
-        # Apply precision
+        # Only the selected entries are rounded and paired with their targets.
         self._scores_targets = [
-            (round(score, self.precision), target)
-            for (score, target) in self._scores_targets
+            (round(float(scores[i]), self.precision), self._format_target(i))
+            for i in indices[start_pos:]
         ]
-
-        # Limit number of results, disregarding the first entry if `remove_reference`
-        # flag was passed.
-        start_pos = int(self.hide_reference and not self.is_query)
-        range = slice(start_pos, start_pos + self.max_results)
-        self._scores_targets = self._scores_targets[range]
+        if self.lines is not None:
+            self._lines = [self.lines[i] for i in indices[start_pos:]]
 
         return self
 
-    def _format_targets(self):
+    def _format_target(self, i: int) -> Path:
+        target = self.targets[i]
         if self.absolute_paths:
-            self.targets = [x.resolve() for x in self.targets]
-        return self
+            target = target.resolve()
+        return target
 
     def _format_score(self, score):
         return f"{score}" + " " if self.show_scores else ""
@@ -108,9 +108,8 @@ class BaseFormatter:
 
 
 class JsonFormatter(BaseFormatter):
-    def format(self):
-        if self.heading:
-            print(self.heading)
+    def entries(self) -> list[dict]:
+        """Return the results as JSON-serializable dictionaries."""
         if self.show_scores:
             entries = [
                 {"score": score, "target": str(target)}
@@ -118,5 +117,13 @@ class JsonFormatter(BaseFormatter):
             ]
         else:
             entries = [{"target": str(target)} for _, target in self._scores_targets]
-        json_data = json.dumps(entries)
+        if self._lines is not None:
+            for entry, (start, end) in zip(entries, self._lines):
+                entry["lines"] = [start, end]
+        return entries
+
+    def format(self):
+        if self.heading:
+            print(self.heading)
+        json_data = json.dumps(self.entries())
         return json_data
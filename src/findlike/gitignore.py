@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+GITIGNORE_FILE = ".gitignore"
+
+
+def translate(pattern: str) -> str:
+    """Translate a glob or gitignore pattern into a regular expression.
+
+    Unlike `fnmatch.translate`, wildcards do not match `/`, except for `**`.
+    """
+    result = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            result.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            result.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            result.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(result)
+
+
+class GitIgnore:
+    """Rules of the .gitignore files found while walking a directory tree.
+
+    The rules of a .gitignore file apply to the files below its directory,
+    after the rules of the .gitignore files of the parent directories, and
+    the last matching rule decides whether a file is ignored. Rules may be
+    negated with `!`, restricted to directories with a trailing `/` and
+    anchored to the directory of the .gitignore file with a leading or
+    inner `/`. Wildcards follow git's rules, including `**`.
+
+    Args:
+        rules (list, optional): Compiled rules inherited from the parent
+            directories. Defaults to [].
+    """
+
+    def __init__(self, rules: list[tuple[str, re.Pattern, bool, bool]] | None = None):
+        self.rules = rules or []
+
+    def child(self, directory: Path, base: str) -> GitIgnore:
+        """Return the rules that apply to the files in `directory`.
+
+        Args:
+            directory (Path): A directory of the walked tree.
+            base (str): Path of `directory` relative to the root of the walk,
+                in POSIX form ("" for the root itself).
+
+        Returns:
+            GitIgnore: The current rules followed by the rules of the
+                .gitignore file in `directory`, if there is one.
+        """
+        try:
+            lines = (directory / GITIGNORE_FILE).read_text().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return self
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = translate(line.lstrip("/"))
+            prefix = "" if anchored else "(?:.*/)?"
+            rules.append((base, re.compile(prefix + body + "$"), negate, dir_only))
+        return GitIgnore(rules)
+
+    def ignores(self, path: str, is_dir: bool) -> bool:
+        """Check whether a path is ignored.
+
+        Args:
+            path (str): Path relative to the root of the walk, in POSIX form.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the last rule matching `path` ignores it.
+        """
+        for base, regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base + "/"):
+                    continue
+                relative = path[len(base) + 1 :]
+            else:
+                relative = path
+            if regex.match(relative):
+                return not negate
+        return False
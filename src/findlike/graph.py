@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .utils import top_k
+
+GRAPH_FORMATS = [".csv", ".jsonl", ".npz"]
+
+
+def similarity_graph(
+    embeddings: csr_matrix,
+    max_neighbors: int,
+    threshold: float = 0.0,
+    block_size: int = 1024,
+) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """Find the most similar documents of every document.
+
+    The similarities are computed as dot products between the rows of
+    `embeddings`, which amounts to the cosine similarity when the rows are
+    L2-normalized (as `Tfidf.target_embeddings_` are). They are computed in
+    blocks of rows, and only the best neighbors of each row are kept, so the
+    memory used is bounded by the size of a block instead of growing with the
+    square of the number of documents.
+
+    Args:
+        embeddings (csr_matrix): Document embeddings, one row per document.
+        max_neighbors (int): Maximum number of neighbors of each document.
+        threshold (float, optional): Minimum similarity of a neighbor.
+            Neighbors with zero similarity are never included.
+            Defaults to 0.0.
+        block_size (int, optional): Number of rows computed at once.
+            Defaults to 1024.
+
+    Yields:
+        tuple[int, np.ndarray, np.ndarray]: Index of a document, indices of
+            its neighbors and their similarities, by descending similarity.
+            The document itself is not included among its neighbors.
+    """
+    embeddings = csr_matrix(embeddings)
+    transposed = embeddings.T.tocsc()
+    for start in range(0, embeddings.shape[0], block_size):
+        block = csr_matrix(embeddings[start : start + block_size] @ transposed)
+        for offset in range(block.shape[0]):
+            row = start + offset
+            columns = block.indices[block.indptr[offset] : block.indptr[offset + 1]]
+            scores = block.data[block.indptr[offset] : block.indptr[offset + 1]]
+            mask = columns != row
+            columns, scores = columns[mask], scores[mask]
+            best = top_k(scores, max_neighbors, threshold)
+            yield row, columns[best], scores[best]
+
+
+def write_graph(
+    graph: Iterator[tuple[int, np.ndarray, np.ndarray]],
+    paths: list[Path],
+    output: Path,
+    precision: int = 2,
+):
+    """Write a similarity graph as an edge list or as a sparse matrix.
+
+    The format depends on the extension of `output`:
+
+    - ``.csv``: one ``source,target,score`` line per edge, with a header.
+    - ``.jsonl``: one ``{"source", "target", "score"}`` object per edge.
+    - ``.npz``: sparse adjacency matrix readable by `scipy.sparse.load_npz`,
+      with the document paths stored under the ``paths`` key.
+
+    Args:
+        graph (Iterator): Neighbors of each document, as yielded by
+            `similarity_graph`.
+        paths (list[Path]): Document paths, indexed like the graph rows.
+        output (Path): Output file.
+        precision (int, optional): Number of decimal places of the scores in
+            text formats. Defaults to 2.
+    """
+    suffix = output.suffix.lower()
+    if suffix not in GRAPH_FORMATS:
+        raise ValueError(
+            f"Unsupported graph format '{suffix}'. Use one of {GRAPH_FORMATS}."
+        )
+
+    if suffix == ".npz":
+        indptr, indices, data = [0], [], []
+        for _, neighbors, scores in graph:
+            indptr.append(indptr[-1] + len(neighbors))
+            indices.append(neighbors)
+            data.append(scores)
+        n = len(paths)
+        matrix = csr_matrix(
+            (
+                np.concatenate([np.zeros(0), *data]),
+                np.concatenate([np.zeros(0, dtype=np.int32), *indices]),
+                np.array(indptr),
+            ),
+            shape=(n, n),
+        )
+        np.savez_compressed(
+            output,
+            format=b"csr",
+            shape=matrix.shape,
+            data=matrix.data,
+            indices=matrix.indices,
+            indptr=matrix.indptr,
+            paths=np.array([str(p) for p in paths]),
+        )
+        return
+
+    with output.open("w", newline="") as f:
+        if suffix == ".csv":
+            writer = csv.writer(f)
+            writer.writerow(["source", "target", "score"])
+        for row, neighbors, scores in graph:
+            source = str(paths[row])
+            for column, score in zip(neighbors, scores):
+                target = str(paths[column])
+                score = round(float(score), precision)
+                if suffix == ".csv":
+                    writer.writerow([source, target, score])
+                else:
+                    edge = {"source": source, "target": target, "score": score}
+                    f.write(json.dumps(edge) + "\n")
@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+from .parallel import count_tokens, hash_documents, tokenize_documents
+from .preprocessing import Corpus, Processor
+from .sections import Section
+from .storage import (
+    generation_directory,
+    load_array,
+    load_csr,
+    new_generation,
+    remove_old_generations,
+    save_array,
+    save_csr,
+    save_json,
+)
+from .utils import compress
+
+INDEX_VERSION = 6
+MANIFEST_FILE = "manifest.json"
+COUNTS_NAME = "counts"
+PATHS_FILE = "paths.npy"
+FREQUENCIES_FILE = "frequencies.npy"
+STEMS_FILE = "stems.json"
+MODELS_DIR = "models"
+
+
+def file_signature(path: Path) -> tuple[int, int]:
+    """Return the modification time (in nanoseconds) and size of a file."""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def document_digest(document: str) -> str:
+    """Return a short content digest of a document."""
+    return hashlib.blake2b(document.encode(), digest_size=16).hexdigest()
+
+
+def sections_digest(sections: list[Section]) -> str:
+    """Return the content digest of a document from its sections.
+
+    A document that is not split into sections has the digest returned by
+    `document_digest`.
+    """
+    return document_digest("\n".join(section.text for section in sections))
+
+
+def _split_paths(path: Path) -> list[str]:
+    """Read a table of paths written by `Index.save`."""
+    table = bytes(load_array(path)).decode()
+    return table.split("\0") if table else []
+
+
+class Index:
+    """Persistent store of per-document term counts.
+
+    The index keeps the modification time and size of every scanned file, so
+    that a later run can tell whether the directory changed since the index
+    was built. Valid documents are stored as a sparse matrix of term counts,
+    together with the vocabulary and the document frequencies, which is all
+    the similarity algorithms need to be fitted without reading the files
+    again. When the directory changes, only the affected documents are read
+    and tokenized by `update`. If the corpus splits documents into sections,
+    each section is a row of its own.
+
+    The term counts and the paths are stored as raw arrays that `load`
+    memory-maps, so loading the index does not read them into memory.
+
+    With `n_features`, terms are counted in hash buckets instead, as by
+    `HashedTfidf`, and no vocabulary is kept.
+
+    Args:
+        directory (Path | None): Directory where the index files are stored.
+            If None, the index is only kept in memory.
+        settings (dict): Options that affect how documents are read and
+            tokenized. An index built with different settings is discarded.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        buffer_size (int, optional): Maximum total length, in characters, of
+            the documents that are read before being tokenized. Documents are
+            tokenized in batches of this size and their text is dropped right
+            away, so the memory used by `update` does not grow with the size
+            of the corpus. Defaults to 2**25.
+        n_features (int | None, optional): Number of hash buckets (columns)
+            to count the terms in, or None to map terms to columns with a
+            vocabulary. Defaults to None.
+
+    Attributes:
+        paths_ (list[Path]): Paths of the indexed documents, one per row.
+        lines_ (list[tuple[int, int]]): Line range of each row in its file.
+        counts_ (csr_matrix): Term counts, one row per indexed document.
+        vocabulary_ (dict[str, int]): Mapping of terms to column indices,
+            which is empty if the terms are hashed.
+        frequencies_ (np.ndarray): Number of documents containing each term.
+        digests_ (list[str]): Content digest of the document of each row.
+        files_ (dict[str, tuple[int, int]]): Signature of every scanned file,
+            including the ones that were not considered valid documents.
+        generation_ (str): Identifier of the saved state of the index, which
+            changes every time the index is saved, or "" if the index changed
+            since it was last saved or loaded.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None,
+        settings: dict[str, Any],
+        jobs: int = 1,
+        buffer_size: int = 2**25,
+        n_features: int | None = None,
+    ):
+        self.directory = directory
+        self.settings = settings
+        self.jobs = jobs
+        self.buffer_size = buffer_size
+        self.n_features = n_features
+
+        self.paths_: list[Path] = []
+        self.lines_: list[tuple[int, int]] = []
+        self.counts_ = csr_matrix((0, 0), dtype=np.int32)
+        self.vocabulary_: dict[str, int] = {}
+        self.frequencies_ = np.zeros(0, dtype=np.int64)
+        self.digests_: list[str] = []
+        self.files_: dict[str, tuple[int, int]] = {}
+        self.generation_ = ""
+
+    def load(self) -> bool:
+        """Load the index from disk.
+
+        Returns:
+            bool: True if a compatible index was found and loaded.
+        """
+        if self.directory is None:
+            return False
+        manifest_path = self.directory / MANIFEST_FILE
+        if not manifest_path.is_file():
+            return False
+        with manifest_path.open() as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("version") != INDEX_VERSION
+            or manifest.get("settings") != self.settings
+        ):
+            return False
+
+        # The counts are mapped copy-on-write, because some models modify the
+        # matrices they are fitted on in place.
+        generation = generation_directory(self.directory, manifest["generation"])
+        counts = load_csr(
+            generation, COUNTS_NAME, shape=tuple(manifest["shape"]), mmap_mode="c"
+        )
+        if counts is None:
+            # The generation was removed by a newer save.
+            return False
+        try:
+            paths = _split_paths(generation / PATHS_FILE)
+            frequencies = load_array(generation / FREQUENCIES_FILE, None)
+        except (OSError, ValueError):
+            return False
+        # A truncated or mismatched manifest would otherwise only fail, or
+        # return the wrong paths, when the documents are scored.
+        n_documents, n_terms = counts.shape
+        if (
+            len(paths) != n_documents
+            or len(manifest["lines"]) != n_documents
+            or len(manifest["digests"]) != n_documents
+            or n_terms != (self.n_features or len(manifest["vocabulary"]))
+            or len(frequencies) != n_terms
+        ):
+            return False
+        self.counts_ = counts
+        self.paths_ = [Path(p) for p in paths]
+        self.lines_ = [tuple(lines) for lines in manifest["lines"]]
+        self.digests_ = manifest["digests"]
+        self.vocabulary_ = {term: i for i, term in enumerate(manifest["vocabulary"])}
+        self.files_ = {p: tuple(sig) for p, sig in manifest["files"].items()}
+        self.frequencies_ = frequencies
+        self.generation_ = manifest["generation"]
+        return True
+
+    def save(self):
+        """Write the index to disk.
+
+        The arrays are written to the directory of a new generation, which
+        the manifest then points to (see `storage.new_generation`). The
+        previous generations are removed once the manifest is replaced.
+        """
+        self.generation_, generation = new_generation(self.directory)
+        save_csr(generation, COUNTS_NAME, self.counts_)
+        paths = "\0".join(str(p) for p in self.paths_).encode()
+        save_array(generation / PATHS_FILE, np.frombuffer(paths, dtype=np.uint8))
+        save_array(generation / FREQUENCIES_FILE, self.frequencies_)
+
+        terms = [""] * len(self.vocabulary_)
+        for term, column in self.vocabulary_.items():
+            terms[column] = term
+        manifest = {
+            "version": INDEX_VERSION,
+            "generation": self.generation_,
+            "settings": self.settings,
+            "shape": self.counts_.shape,
+            "lines": self.lines_,
+            "digests": self.digests_,
+            "vocabulary": terms,
+            "files": self.files_,
+        }
+        # Write the manifest last and atomically, so that an interrupted save
+        # never leaves a manifest pointing to incomplete data.
+        save_json(self.directory / MANIFEST_FILE, manifest)
+        remove_old_generations(self.directory, self.generation_)
+
+    def model_directory(self, name: str) -> Path | None:
+        """Return the directory where a model fitted on the index is saved.
+
+        Returns:
+            Path | None: A directory below the index directory, or None if
+                the index is only kept in memory.
+        """
+        if self.directory is None:
+            return None
+        return self.directory / MODELS_DIR / name
+
+    def update(
+        self,
+        paths: Iterable[Path],
+        corpus: Corpus,
+        processor: Processor,
+        partial: bool = False,
+    ) -> bool:
+        """Bring the index up to date with the current state of `paths`.
+
+        Only files that were added, modified or deleted since the last update
+        are read and tokenized. A modified file whose content digest did not
+        change is not tokenized again. The document frequencies are updated
+        in place with the counts of the removed and added rows.
+
+        Args:
+            paths (Iterable[Path]): Paths of the files to be indexed. They are
+                only iterated over once, so they can be generated lazily.
+            corpus (Corpus): Corpus whose filtering rules are used to read
+                the files.
+            processor (Processor): Processor used to tokenize the documents.
+            partial (bool, optional): If True, `paths` are only the files
+                that changed (e.g. as reported by a `Watcher`): the ones that
+                no longer exist are removed, and the other indexed files are
+                kept. If False, the indexed files that are not in `paths`
+                are removed. Defaults to False.
+
+        Returns:
+            bool: True if the index changed.
+        """
+        rows: dict[str, list[int]] = {}
+        for i, p in enumerate(self.paths_):
+            rows.setdefault(str(p), []).append(i)
+        seen = set()
+        stale_rows = []
+        blocks = []
+        pending: list[tuple[Path, list[Section], str]] = []
+        pending_size = 0
+        modified = []
+        missing = []
+
+        def modified_paths() -> Iterator[Path]:
+            for path in paths:
+                key = str(path)
+                if key in seen:
+                    continue
+                try:
+                    signature = file_signature(path)
+                except OSError:
+                    # The file disappeared after the paths were collected.
+                    missing.append(key)
+                    continue
+                seen.add(key)
+                if self.files_.get(key) == signature:
+                    continue
+                self.files_[key] = signature
+                modified.append(key)
+                yield path
+
+        for path, sections in corpus.read_many(modified_paths(), sections=True):
+            file_rows = rows.get(str(path))
+            if sections is None:
+                if file_rows is not None:
+                    stale_rows.extend(file_rows)
+                continue
+            digest = sections_digest(sections)
+            if file_rows is not None:
+                if self.digests_[file_rows[0]] == digest:
+                    continue
+                stale_rows.extend(file_rows)
+            pending.append((path, sections, digest))
+            pending_size += sum(len(section.text) for section in sections)
+            if pending_size >= self.buffer_size:
+                blocks.append(self._count_documents(pending, processor))
+                pending = []
+                pending_size = 0
+        if pending:
+            blocks.append(self._count_documents(pending, processor))
+
+        changed = bool(modified)
+        if partial:
+            deleted = self.files_.keys() & set(missing)
+        else:
+            deleted = self.files_.keys() - seen
+        for key in deleted:
+            del self.files_[key]
+            changed = True
+            if key in rows:
+                stale_rows.extend(rows[key])
+
+        if stale_rows:
+            self._remove_rows(stale_rows)
+        if blocks:
+            self._append_rows(blocks)
+
+        # Terms that are no longer used by any document are left behind as
+        # empty columns. Drop them once they make up most of the vocabulary.
+        unused = np.count_nonzero(self.frequencies_ == 0)
+        if self.n_features is None and unused > len(self.vocabulary_) // 2:
+            self._compact()
+        if changed:
+            # The saved index, and the models fitted on it, are out of date.
+            self.generation_ = ""
+        return changed
+
+    def _n_columns(self) -> int:
+        """Return the number of columns of the term counts."""
+        return self.n_features or len(self.vocabulary_)
+
+    def _remove_rows(self, rows: list[int]):
+        removed = self.counts_[rows]
+        self.frequencies_ -= np.bincount(
+            removed.indices, minlength=len(self.frequencies_)
+        )
+        keep = np.ones(len(self.paths_), dtype=bool)
+        keep[rows] = False
+        self.counts_ = self.counts_[keep]
+        self.paths_ = compress(self.paths_, keep)
+        self.lines_ = compress(self.lines_, keep)
+        self.digests_ = compress(self.digests_, keep)
+
+    def _count_documents(
+        self, documents: list[tuple[Path, list[Section], str]], processor: Processor
+    ) -> tuple[csr_matrix, list[Path], list[tuple[int, int]], list[str]]:
+        """Tokenize the sections of documents and count their terms.
+
+        New terms are added to the index vocabulary, unless the terms are
+        hashed, but the counts are not added to the index (see
+        `_append_rows`).
+
+        Returns:
+            tuple[csr_matrix, list[Path], list[tuple[int, int]], list[str]]:
+                Term counts, paths, line ranges and digests of the rows.
+        """
+        rows = [
+            (path, section, digest)
+            for path, sections, digest in documents
+            for section in sections
+        ]
+        texts = [section.text for _, section, _ in rows]
+        if self.n_features is not None:
+            counts = hash_documents(processor, texts, self.n_features, jobs=self.jobs)
+        else:
+            token_ids, _ = tokenize_documents(
+                processor, texts, jobs=self.jobs, vocabulary=self.vocabulary_
+            )
+            counts = count_tokens(token_ids, len(self.vocabulary_))
+        paths = [path for path, _, _ in rows]
+        lines = [(section.start, section.end) for _, section, _ in rows]
+        digests = [digest for _, _, digest in rows]
+        return counts, paths, lines, digests
+
+    def _append_rows(
+        self,
+        blocks: list[tuple[csr_matrix, list[Path], list[tuple[int, int]], list[str]]],
+    ):
+        """Add the term counts returned by `_count_documents` to the index."""
+        n_terms = self._n_columns()
+        frequencies = np.zeros(n_terms, dtype=np.int64)
+        frequencies[: len(self.frequencies_)] = self.frequencies_
+        # The current matrix may be shared with a fitted model.
+        matrices = [self.counts_.copy()]
+        for counts, paths, lines, digests in blocks:
+            matrices.append(counts)
+            frequencies += np.bincount(counts.indices, minlength=n_terms)
+            self.paths_.extend(paths)
+            self.lines_.extend(lines)
+            self.digests_.extend(digests)
+        for counts in matrices:
+            counts.resize((counts.shape[0], n_terms))
+        self.counts_ = vstack(matrices, format="csr")
+        self.frequencies_ = frequencies
+
+    def _compact(self):
+        """Remove unused terms from the vocabulary."""
+        used = self.frequencies_ > 0
+        self.counts_ = self.counts_[:, used].tocsr()
+        self.frequencies_ = self.frequencies_[used]
+        new_columns = np.cumsum(used) - 1
+        self.vocabulary_ = {
+            term: int(new_columns[column])
+            for term, column in self.vocabulary_.items()
+            if used[column]
+        }
+
+    def contains(self, document: str | list[Section]) -> bool:
+        """Check whether a document with the same content is indexed.
+
+        Args:
+            document (str | list[Section]): Content of the document, or its
+                sections as returned by `Corpus.read_sections` if the index
+                splits documents into sections.
+        """
+        if isinstance(document, str):
+            return document_digest(document) in self.digests_
+        return sections_digest(document) in self.digests_
+
+    def with_document(
+        self, document: str, processor: Processor
+    ) -> tuple[csr_matrix, dict[str, int]]:
+        """Return the term counts with an extra row for `document`.
+
+        The index itself is left untouched. Terms not seen in the indexed
+        documents are appended to a copy of the vocabulary, unless the terms
+        are hashed.
+
+        Args:
+            document (str): Document to be appended.
+            processor (Processor): Processor used to tokenize the document.
+
+        Returns:
+            tuple[csr_matrix, dict[str, int]]: Term counts and vocabulary.
+        """
+        vocabulary = dict(self.vocabulary_)
+        if self.n_features is not None:
+            row = hash_documents(processor, [document], self.n_features)
+        else:
+            columns, counts = self._count_terms(document, processor, vocabulary)
+            row = csr_matrix(
+                (counts, (np.zeros(len(columns), dtype=np.int32), columns)),
+                shape=(1, len(vocabulary)),
+                dtype=np.int32,
+            )
+        matrix = self.counts_.copy()
+        matrix.resize((matrix.shape[0], row.shape[1]))
+        return vstack([matrix, row], format="csr"), vocabulary
+
+    def _count_terms(
+        self,
+        document: str,
+        processor: Processor,
+        vocabulary: dict[str, int] | None = None,
+    ) -> tuple[list[int], list[int]]:
+        """Tokenize a document and count its terms.
+
+        Args:
+            document (str): Document to be counted.
+            processor (Processor): Processor used to tokenize the document.
+            vocabulary (dict[str, int], optional): Vocabulary to use instead
+                of the index's own. Unseen terms are appended to it.
+
+        Returns:
+            tuple[list[int], list[int]]: Column indices and term counts.
+        """
+        if vocabulary is None:
+            vocabulary = self.vocabulary_
+        columns = []
+        counts = []
+        for term, count in Counter(processor.analyze(document)).items():
+            column = vocabulary.get(term)
+            if column is None:
+                column = vocabulary[term] = len(vocabulary)
+            columns.append(column)
+            counts.append(count)
+        return columns, counts
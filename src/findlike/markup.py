@@ -1,51 +1,315 @@
+from __future__ import annotations
+
+import functools
 import re
+from typing import Callable
+
+FrontMatterStripper = Callable[[str], str]
+
+# Front-matter strippers by file extension (lowercase, with the dot).
+_STRIPPERS: dict[str, FrontMatterStripper] = {}
+
+ORG_DRAWER_START = ":PROPERTIES:"
+ORG_DRAWER_END = ":END:"
+ORG_KEYWORD_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_"
+)
+
+RST_FIELD_RE = re.compile(r":[^:\s][^:]*:(?:\s|$)")
+RST_ADORNMENT_CHARS = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+
+
+def register_stripper(
+    *extensions: str,
+) -> Callable[[FrontMatterStripper], FrontMatterStripper]:
+    """Register a function as the front-matter stripper of file extensions.
+
+    A stripper takes the content of a file and returns it without its front
+    matter, with leading and trailing whitespace removed.
+
+    Args:
+        *extensions (str): File extensions handled by the stripper, with the
+            dot (e.g. ".md").
+
+    Example:
+        >>> @register_stripper(".txt")
+        ... def strip_txt(text):
+        ...     return text.strip()
+    """
+
+    def decorator(function: FrontMatterStripper) -> FrontMatterStripper:
+        for extension in extensions:
+            _STRIPPERS[extension.lower()] = function
+        get_stripper.cache_clear()
+        return function
+
+    return decorator
+
+
+@functools.cache
+def get_stripper(extension: str) -> FrontMatterStripper | None:
+    """Return the front-matter stripper of a file extension, if there is one."""
+    return _STRIPPERS.get(extension.lower())
+
+
+def strip_front_matter(text: str, extension: str) -> str:
+    """Remove the front matter of a document, if its format is supported.
+
+    Args:
+        text (str): Content of the document.
+        extension (str): File extension of the document, with the dot.
+
+    Returns:
+        str: The content without its front matter, or unchanged if the
+            extension has no registered stripper.
+    """
+    stripper = get_stripper(extension)
+    return text if stripper is None else stripper(text)
+
+
+def blank_front_matter(text: str, extension: str) -> str:
+    """Remove the front matter of a document, keeping its line numbers.
+
+    The lines that `strip_front_matter` removes are left blank, so that the
+    document can be split after its front matter was stripped, and the line
+    numbers of its parts still refer to the file.
+
+    Args:
+        text (str): Content of the document.
+        extension (str): File extension of the document, with the dot.
+
+    Returns:
+        str: The content without its front matter, with as many lines as
+            `text`.
+    """
+    stripped = strip_front_matter(text, extension)
+    if stripped == text:
+        return text
+    lines = text.split("\n")
+    result = [""] * len(lines)
+    position = 0
+    # The stripped lines are found in order among the lines of the document,
+    # of which they are whole lines or the end (e.g. after a drawer).
+    for line in stripped.split("\n"):
+        if not line.strip() or position >= len(lines):
+            continue
+        found = next(
+            (i for i in range(position, len(lines)) if line in lines[i]), position
+        )
+        result[found] = line
+        position = found + 1
+    return "\n".join(result)
 
 
 class Markup:
     def __init__(self, extension: str):
         self.extension = extension
-        self._MARKUP_EXTENSIONS = {".org": self._strip_org_frontmatter}
 
     def strip_frontmatter(self, text: str) -> str:
-        if self.extension in self._MARKUP_EXTENSIONS.keys():
-            return self._MARKUP_EXTENSIONS[self.extension](text)
-        else:
-            return text
-
-    def _strip_org_frontmatter(self, content: str) -> str:
-        """
-        Remove front matter from a string representing an Org-mode file.
-
-        This function removes all lines from `:PROPERTIES:` to `:END:`
-        and any lines starting with `#+` from the given content string.
-
-        Args:
-            content (str): The content of an Org-mode file as a string.
-
-        Returns:
-            str: The content with the front matter removed.
-
-        Example:
-            >>> content = '''
-            ... :PROPERTIES:
-            ... :ID: 123
-            ... :END:
-            ... #+TITLE: Example
-            ... This is some text.
-            ... ** A heading
-            ... Some more text.
-            ... '''
-            >>> cleaned_content = remove_front_matter(content)
-            >>> print(cleaned_content)
-            This is some text.
-            ** A heading
-            Some more text.
-        """
-        # Remove :PROPERTIES: to :END: block
-        content = re.sub(r":PROPERTIES:(.|\n)*?:END:", "", content)
-
-        # Remove lines starting with #+
-        pattern = r"^\s*#\+[a-zA-Z0-9_]+.*?$"
-        content = re.sub(pattern, "", content, flags=re.MULTILINE)
-
-        return content.strip()
+        return strip_front_matter(text, self.extension)
+
+
+def _remove_org_drawers(text: str) -> str:
+    """Remove the text from each `:PROPERTIES:` to the next `:END:`.
+
+    A drawer without an `:END:` is kept, and so are the drawers after it.
+    """
+    parts = []
+    position = 0
+    while True:
+        begin = text.find(ORG_DRAWER_START, position)
+        if begin < 0:
+            break
+        end = text.find(ORG_DRAWER_END, begin + len(ORG_DRAWER_START))
+        if end < 0:
+            break
+        parts.append(text[position:begin])
+        position = end + len(ORG_DRAWER_END)
+    if not parts:
+        return text
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+@register_stripper(".org")
+def strip_org(text: str) -> str:
+    """Remove front matter from a string representing an Org-mode file.
+
+    This function removes all text from `:PROPERTIES:` to `:END:` and any
+    lines starting with `#+`, together with the blank lines before them.
+    Both are found by scanning the content once, without backtracking.
+
+    Args:
+        text (str): The content of an Org-mode file as a string.
+
+    Returns:
+        str: The content with the front matter removed.
+
+    Example:
+        >>> content = '''
+        ... :PROPERTIES:
+        ... :ID: 123
+        ... :END:
+        ... #+TITLE: Example
+        ... This is some text.
+        ... ** A heading
+        ... Some more text.
+        ... '''
+        >>> print(strip_org(content))
+        This is some text.
+        ** A heading
+        Some more text.
+    """
+    text = _remove_org_drawers(text)
+    if "#+" not in text:
+        return text.strip()
+    result: list[str] = []
+    # Number of blank lines at the end of `result`.
+    blanks = 0
+    for line in text.split("\n"):
+        if "#+" in line:
+            stripped = line.lstrip()
+            if stripped.startswith("#+") and stripped[2:3] in ORG_KEYWORD_CHARS:
+                if blanks:
+                    del result[-blanks:]
+                result.append("")
+                blanks = 0
+                continue
+        result.append(line)
+        blanks = 0 if line and not line.isspace() else blanks + 1
+    return "\n".join(result).strip()
+
+
+def _strip_delimited_block(
+    text: str, opening: str, closings: tuple[str, ...]
+) -> str | None:
+    """Remove a block at the start of `text` between delimiter lines.
+
+    Returns:
+        str | None: The text after the block, or None if `text` does not
+            start with a complete block.
+    """
+    newline = text.find("\n")
+    if newline < 0 or text[:newline].rstrip() != opening:
+        return None
+    position = newline + 1
+    while position < len(text):
+        newline = text.find("\n", position)
+        if newline < 0:
+            newline = len(text)
+        if text[position:newline].rstrip() in closings:
+            return text[newline + 1 :]
+        position = newline + 1
+    return None
+
+
+@register_stripper(".md", ".markdown")
+def strip_markdown(text: str) -> str:
+    """Remove the YAML (`---`) or TOML (`+++`) front matter of a Markdown file.
+
+    The front matter must start at the first line. A YAML block may also be
+    closed by `...`.
+
+    Args:
+        text (str): The content of a Markdown file.
+
+    Returns:
+        str: The content with the front matter removed.
+    """
+    if text.startswith("---"):
+        body = _strip_delimited_block(text, "---", ("---", "..."))
+    elif text.startswith("+++"):
+        body = _strip_delimited_block(text, "+++", ("+++",))
+    else:
+        body = None
+    return (text if body is None else body).strip()
+
+
+def _is_rst_adornment(line: str) -> bool:
+    line = line.rstrip()
+    return (
+        len(line) >= 2
+        and line[0] in RST_ADORNMENT_CHARS
+        and line.count(line[0]) == len(line)
+    )
+
+
+def _skip_blank_lines(lines: list[str], i: int) -> int:
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    return i
+
+
+@register_stripper(".rst", ".rest")
+def strip_rst(text: str) -> str:
+    """Remove the field list at the top of a reStructuredText file.
+
+    The field list (e.g. `:Author: Jane Doe`) is removed if it starts the
+    document or directly follows its title, which is kept. Indented lines
+    continue the value of the previous field.
+
+    Args:
+        text (str): The content of a reStructuredText file.
+
+    Returns:
+        str: The content with the field list removed.
+    """
+    lines = text.split("\n")
+    i = _skip_blank_lines(lines, 0)
+    if (
+        i + 2 < len(lines)
+        and _is_rst_adornment(lines[i])
+        and lines[i + 1].strip()
+        and _is_rst_adornment(lines[i + 2])
+    ):
+        i = _skip_blank_lines(lines, i + 3)
+    elif (
+        i + 1 < len(lines)
+        and lines[i].strip()
+        and not _is_rst_adornment(lines[i])
+        and _is_rst_adornment(lines[i + 1])
+    ):
+        i = _skip_blank_lines(lines, i + 2)
+    start = i
+    while i < len(lines) and (
+        RST_FIELD_RE.match(lines[i])
+        or (i > start and lines[i][:1] in (" ", "\t") and lines[i].strip())
+    ):
+        i += 1
+    if i == start:
+        return text.strip()
+    return "\n".join(lines[:start] + lines[i:]).strip()
+
+
+def _find_uncommented(text: str, command: str, start: int = 0) -> int:
+    """Find the first occurrence of a LaTeX command that is not commented."""
+    while True:
+        position = text.find(command, start)
+        if position < 0:
+            return -1
+        line_start = text.rfind("\n", 0, position) + 1
+        if "%" not in text[line_start:position].replace("\\%", ""):
+            return position
+        start = position + len(command)
+
+
+@register_stripper(".tex", ".latex")
+def strip_latex(text: str) -> str:
+    """Remove the preamble of a LaTeX file.
+
+    Everything before `\\begin{document}` and after `\\end{document}` is
+    removed. Files without `\\begin{document}`, such as chapters included by
+    another file, are kept unchanged.
+
+    Args:
+        text (str): The content of a LaTeX file.
+
+    Returns:
+        str: The body of the document.
+    """
+    begin = _find_uncommented(text, r"\begin{document}")
+    if begin < 0:
+        return text.strip()
+    begin += len(r"\begin{document}")
+    end = _find_uncommented(text, r"\end{document}", begin)
+    return text[begin : end if end >= 0 else len(text)].strip()
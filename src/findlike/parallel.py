@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
+import os
+from array import array
+from collections import defaultdict
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+from . import profiling
+from .preprocessing import Processor
+
+_worker_processor: Processor | None = None
+
+
+def _init_worker(processor: Processor):
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _tokenize_chunk(
+    documents: list[str],
+    processor: Processor | None = None,
+    vocabulary: dict[str, int] | None = None,
+) -> tuple[list[str], np.ndarray, np.ndarray, tuple[int, int]]:
+    """Tokenize a chunk of documents into token IDs.
+
+    The IDs are interned in `vocabulary`, which is local to the chunk unless
+    given, and collected in an unsigned 32-bit array, so that the tokens take
+    4 bytes each instead of a reference to a string.
+
+    Returns:
+        tuple: The chunk's terms (indexed by ID), the concatenated token IDs
+            of all documents, the number of tokens of each document, and the
+            numbers of stem cache hits and misses, which worker processes
+            cannot report to the profiler themselves.
+    """
+    processor = processor or _worker_processor
+    cache = getattr(processor, "stem_cache", None)
+    hits, misses = (cache.hits_, cache.misses_) if cache is not None else (0, 0)
+    # Unseen terms get the next ID without leaving C code, as in
+    # scikit-learn's CountVectorizer.
+    interned = defaultdict(None, vocabulary or {})
+    interned.default_factory = interned.__len__
+    ids = array("I")
+    lengths = np.zeros(len(documents), dtype=np.int64)
+    for i, document in enumerate(documents):
+        tokens = processor.analyze(document)
+        ids.extend(map(interned.__getitem__, tokens))
+        lengths[i] = len(tokens)
+    if vocabulary is not None:
+        vocabulary.update(interned)
+    if cache is not None:
+        hits, misses = cache.hits_ - hits, cache.misses_ - misses
+    return list(interned), np.frombuffer(ids, dtype=np.uint32), lengths, (hits, misses)
+
+
+def _hash_chunk(
+    documents: list[str], n_features: int, processor: Processor | None = None
+) -> tuple[csr_matrix, tuple[int, int]]:
+    """Count the terms of a chunk of documents in hash buckets.
+
+    Returns:
+        tuple: The term counts of the chunk, one row per document, and the
+            numbers of stem cache hits and misses (see `_tokenize_chunk`).
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    processor = processor or _worker_processor
+    cache = getattr(processor, "stem_cache", None)
+    hits, misses = (cache.hits_, cache.misses_) if cache is not None else (0, 0)
+    hasher = HashingVectorizer(
+        analyzer=processor.analyze,
+        n_features=n_features,
+        alternate_sign=False,
+        norm=None,
+        dtype=np.int32,
+    )
+    counts = hasher.transform(documents)
+    if cache is not None:
+        hits, misses = cache.hits_ - hits, cache.misses_ - misses
+    return counts, (hits, misses)
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Return the number of worker processes, where 0 means all CPUs."""
+    return jobs if jobs > 0 else os.cpu_count() or 1
+
+
+def _split_chunks(documents: list[str], jobs: int) -> list[list[str]]:
+    """Split documents in chunks for a pool of `jobs` worker processes."""
+    # A few chunks per worker keeps the load balanced.
+    chunk_size = -(-len(documents) // (jobs * 4))
+    return [documents[i : i + chunk_size] for i in range(0, len(documents), chunk_size)]
+
+
+def tokenize_documents(
+    processor: Processor,
+    documents: list[str],
+    jobs: int = 1,
+    vocabulary: dict[str, int] | None = None,
+) -> tuple[list[np.ndarray], dict[str, int]]:
+    """Tokenize documents into arrays of vocabulary IDs.
+
+    The documents are split in chunks that are tokenized by a pool of worker
+    processes. Each worker sends back compact ID arrays instead of lists of
+    strings, and the IDs are then mapped to a vocabulary shared by all chunks.
+    The results do not depend on the number of workers.
+
+    Args:
+        processor (Processor): Processor used to tokenize the documents.
+        documents (list[str]): Documents to be tokenized.
+        jobs (int, optional): Number of worker processes. If 1, the documents
+            are tokenized in the current process. If 0, all CPUs are used.
+            Defaults to 1.
+        vocabulary (dict[str, int], optional): Mapping of terms to IDs to
+            reuse. New terms are appended to it. Defaults to a new mapping.
+
+    Returns:
+        tuple[list[np.ndarray], dict[str, int]]: Token IDs of each document,
+            as views of a single uint32 array, and the mapping of terms to
+            IDs.
+    """
+    if vocabulary is None:
+        vocabulary = {}
+    if not documents:
+        return [], vocabulary
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(documents) < 2:
+        _, ids, lengths, _ = _tokenize_chunk(documents, processor, vocabulary)
+        profiling.count(documents_tokenized=len(documents), tokens=len(ids))
+        return np.split(ids, np.cumsum(lengths)[:-1]), vocabulary
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(processor,)
+    ) as executor:
+        results = list(executor.map(_tokenize_chunk, _split_chunks(documents, jobs)))
+
+    token_ids = []
+    for terms, ids, lengths, (hits, misses) in results:
+        mapping = np.array(
+            [vocabulary.setdefault(t, len(vocabulary)) for t in terms],
+            dtype=np.uint32,
+        )
+        token_ids.extend(np.split(mapping[ids], np.cumsum(lengths)[:-1]))
+        profiling.count(
+            documents_tokenized=len(lengths),
+            tokens=len(ids),
+            stem_hits=hits,
+            stem_misses=misses,
+        )
+    return token_ids, vocabulary
+
+
+def hash_documents(
+    processor: Processor, documents: list[str], n_features: int, jobs: int = 1
+) -> csr_matrix:
+    """Count the terms of documents in hash buckets, without a vocabulary.
+
+    Terms are mapped to columns as by scikit-learn's `HashingVectorizer`, so
+    each chunk of documents is counted by a worker process independently of
+    the others, and the memory used does not depend on the number of
+    distinct terms.
+
+    Args:
+        processor (Processor): Processor used to tokenize the documents.
+        documents (list[str]): Documents to be counted.
+        n_features (int): Number of hash buckets (columns).
+        jobs (int, optional): Number of worker processes, as for
+            `tokenize_documents`. Defaults to 1.
+
+    Returns:
+        csr_matrix: Term counts, one row per document.
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(documents) < 2:
+        counts, _ = _hash_chunk(documents, n_features, processor)
+        results = [(counts, (0, 0))]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(processor,)
+        ) as executor:
+            chunks = _split_chunks(documents, jobs)
+            results = list(
+                executor.map(_hash_chunk, chunks, itertools.repeat(n_features))
+            )
+    for counts, (hits, misses) in results:
+        profiling.count(
+            documents_tokenized=counts.shape[0],
+            tokens=int(counts.sum()),
+            stem_hits=hits,
+            stem_misses=misses,
+        )
+    if len(results) == 1:
+        return results[0][0]
+    return vstack([counts for counts, _ in results], format="csr")
+
+
+def count_tokens(token_ids: list[np.ndarray], n_terms: int) -> csr_matrix:
+    """Build a term count matrix from arrays of token IDs.
+
+    Args:
+        token_ids (list[np.ndarray]): Token IDs of each document.
+        n_terms (int): Size of the vocabulary.
+
+    Returns:
+        csr_matrix: Term counts, one row per document.
+    """
+    indptr = np.zeros(len(token_ids) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in token_ids], out=indptr[1:])
+    columns = np.concatenate(token_ids) if token_ids else np.zeros(0, dtype=np.uint32)
+    counts = csr_matrix(
+        (np.ones(len(columns), dtype=np.int32), columns, indptr),
+        shape=(len(token_ids), n_terms),
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def count_terms(
+    processor: Processor, documents: list[str], vocabulary: dict[str, int]
+) -> csr_matrix:
+    """Count the terms of documents that are in a fixed vocabulary.
+
+    This is the equivalent of `CountVectorizer.transform`, used to count the
+    terms of queries without importing scikit-learn.
+
+    Args:
+        processor (Processor): Processor used to tokenize the documents.
+        documents (list[str]): Documents to be counted.
+        vocabulary (dict[str, int]): Mapping of terms to column indices.
+            Terms that are not in it are ignored.
+
+    Returns:
+        csr_matrix: Term counts, one row per document.
+    """
+    get = vocabulary.get
+    ids = array("I")
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    for i, document in enumerate(documents):
+        columns = map(get, processor.analyze(document))
+        ids.extend([column for column in columns if column is not None])
+        indptr[i + 1] = len(ids)
+    counts = csr_matrix(
+        (
+            np.ones(len(ids), dtype=np.int32),
+            np.frombuffer(ids, dtype=np.uint32),
+            indptr,
+        ),
+        shape=(len(documents), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    return counts
@@ -1,14 +1,126 @@
 from __future__ import annotations
 
+import json
 import re
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Callable
 
-from .markup import Markup
-from .utils import try_read_file
+from . import markup, profiling
+from .sections import Section
+from .utils import map_ordered, try_read_file
 
 SCRIPT_PATH = Path(__file__).parent
 
+DEFAULT_URL_RE = r"\S*https?:\S*"
+
+
+class SnowballStemmer:
+    """NLTK's Snowball stemmer, imported when the first word is stemmed.
+
+    Importing NLTK takes most of the startup time, and the words of a query
+    are often all found in a `StemCache` loaded from an index.
+
+    Args:
+        language (str): Language of the stemmer.
+    """
+
+    def __init__(self, language: str):
+        self.language = language
+        self._stem: Callable | None = None
+
+    def __call__(self, word: str) -> str:
+        if self._stem is None:
+            from nltk.stem import SnowballStemmer
+
+            self._stem = SnowballStemmer(self.language).stem
+        return self._stem(word)
+
+    def __getstate__(self) -> dict:
+        # Worker processes import NLTK themselves if they need it.
+        return {"language": self.language, "_stem": None}
+
+
+class StemCache:
+    """Bounded memoization cache for a stemmer function.
+
+    Word frequencies are heavily skewed, so most tokens of a corpus are words
+    that were already stemmed. When the cache is full, the least recently used
+    stems are evicted. The cache is pickled along with its `Processor`, so
+    worker processes start with the stems that are already known. The hits
+    and misses are reported to the current `--profile` stage as `stem_hits`
+    and `stem_misses`.
+
+    Args:
+        stemmer (Callable): Stemmer function that takes a word and returns its stem.
+        max_size (int, optional): Maximum number of stems kept in the cache.
+            Defaults to 65536.
+
+    Attributes:
+        hits_ (int): Number of words whose stem was found in the cache.
+        misses_ (int): Number of words that had to be stemmed.
+    """
+
+    def __init__(self, stemmer: Callable, max_size: int = 65536):
+        self.stemmer = stemmer
+        self.max_size = max_size
+        self.hits_ = 0
+        self.misses_ = 0
+        self._stems: OrderedDict[str, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._stems)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the words whose stem was found in the cache."""
+        total = self.hits_ + self.misses_
+        return self.hits_ / total if total else 0.0
+
+    def stem(self, words: list[str]) -> list[str]:
+        """Get the stems of a list of words."""
+        stems = self._stems
+        result = []
+        misses = 0
+        for word in words:
+            stem = stems.get(word)
+            if stem is None:
+                stem = stems[word] = self.stemmer(word)
+                misses += 1
+                if len(stems) > self.max_size:
+                    stems.popitem(last=False)
+            else:
+                stems.move_to_end(word)
+            result.append(stem)
+        self.misses_ += misses
+        self.hits_ += len(words) - misses
+        profiling.count(stem_hits=len(words) - misses, stem_misses=misses)
+        return result
+
+    def load(self, path: Path):
+        """Add the stems saved in a JSON file to the cache.
+
+        A missing or corrupt file is ignored, as the stems are only a cache.
+        """
+        try:
+            with path.open() as f:
+                stems = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(stems, dict):
+            return
+        for word, stem in stems.items():
+            self._stems[word] = stem
+        while len(self._stems) > self.max_size:
+            self._stems.popitem(last=False)
+
+    def save(self, path: Path):
+        """Save the cached stems to a JSON file, replacing it atomically."""
+        from .storage import save_json
+
+        save_json(path, self._stems)
+
 
 class Processor:
     """Class containing preprocessing and tokenization rules.
@@ -20,6 +132,11 @@ class Processor:
             Defaults to r"(?u)\b\\w{2,}\b".
         url_re (str, optional): Regular expression pattern to remove URLs from text.
             Defaults to r"\\S*https?:\\S*".
+        stem_cache_size (int, optional): Maximum number of stems to memoize.
+            Set to 0 to disable the cache. Defaults to 65536.
+
+    Attributes:
+        stem_cache (StemCache | None): Stem memoization cache.
     """
 
     def __init__(
@@ -27,14 +144,30 @@ class Processor:
         stopwords: list[str],
         stemmer: Callable,
         word_re: str = r"(?u)\b\w{2,}\b",  # \w matches word characters
-        url_re: str = r"\S*https?:\S*",
+        url_re: str = DEFAULT_URL_RE,
+        stem_cache_size: int = 65536,
     ):
         self.stopwords = stopwords
         self.stemmer = stemmer
+        self.stem_cache = (
+            StemCache(stemmer, max_size=stem_cache_size) if stem_cache_size else None
+        )
         self.word_re = re.compile(word_re)
         self.url_re = re.compile(url_re)
         self._stopwords_re = re.compile(r"\b(" + r"|".join(stopwords) + r")\b\s*")
 
+        # Single words are filtered out with a set lookup by `analyze`. Only
+        # stopwords such as "don't", which are not extracted as a single word,
+        # still need to be removed from the text beforehand.
+        self._stopwords_set = {w for w in stopwords if re.fullmatch(r"\w+", w)}
+        compound_stopwords = [w for w in stopwords if w not in self._stopwords_set]
+        pattern = r"|".join(map(re.escape, compound_stopwords))
+        self._compound_stopwords_re = (
+            re.compile(r"\b(" + pattern + r")\b") if compound_stopwords else None
+        )
+        # Literal that every match of the URL pattern contains, if known.
+        self._url_hint = "http" if url_re == DEFAULT_URL_RE else None
+
     def preprocessor(self, text: str) -> str:
         """Remove fancy symbols and stopwords."""
         text = text.lower()
@@ -43,6 +176,31 @@ class Processor:
         text = self.url_re.sub("", text)
         return text
 
+    def analyze(self, text: str) -> list[str]:
+        """Preprocess, tokenize and stem a text in a single pass.
+
+        This is a faster version of `tokenizer(preprocessor(text))`: words
+        are extracted once and stopwords are dropped with a set lookup, and
+        the URL pattern only runs on texts that may contain a URL.
+
+        The result differs from `tokenizer(preprocessor(text))` in two ways.
+        Stopwords that are contractions (e.g. "you're") are removed whole,
+        whereas `preprocessor` removes "you" and leaves "re" as a token. And
+        URLs are removed before the stopwords, whereas `preprocessor` first
+        removes the stopwords, which can split a URL (e.g. "x.com/the dog"
+        loses "dog" along with the URL).
+        """
+        text = text.lower()
+        if "’" in text:
+            text = text.translate({ord("’"): ord("'")})
+        if self._url_hint is None or self._url_hint in text:
+            text = self.url_re.sub("", text)
+        if self._compound_stopwords_re is not None and "'" in text:
+            text = self._compound_stopwords_re.sub("", text)
+        stopwords = self._stopwords_set
+        words = [w for w in self.word_re.findall(text) if w not in stopwords]
+        return self._stemmize(words)
+
     def tokenizer(self, text: str) -> list[str]:
         """Run the tokenization and post-processing.
         This method should be called by the similarity algorithms.
@@ -60,6 +218,8 @@ class Processor:
 
     def _stemmize(self, tokens: list[str]) -> list[str]:
         """Get only the stems from a list of words."""
+        if self.stem_cache is not None:
+            return self.stem_cache.stem(tokens)
         return [self.stemmer(w) for w in tokens]
 
 
@@ -70,9 +230,24 @@ class Corpus:
         paths (list of Path): Document paths.
         min_chars (int): Minimum document size (in number of chars) to include
             in the corpus.
+        ignore_front_matter (bool, optional): Whether to strip the front
+            matter of the documents. Defaults to False.
+        read_workers (int, optional): Number of threads reading files
+            concurrently. Defaults to 8.
+        mmap_min_size (int, optional): Size in bytes from which files are
+            memory-mapped instead of read. Defaults to None (never).
+        max_size (int, optional): Files larger than this many bytes are
+            skipped. Defaults to None (no limit).
+        encodings (list of str, optional): Fallback encodings for files that
+            cannot be decoded with the locale encoding. Defaults to [].
+        splitter (Callable, optional): Function splitting a document into
+            sections (see `sections.make_splitter`), which are added to the
+            corpus as separate documents. Defaults to None (no splitting).
     Properties:
         documents_ (list of str): List of filtered document contents.
         paths_ (list of Path): List of filtered document paths.
+        lines_ (list of tuple[int, int]): Line range of each document in its
+            file, if the documents are split into sections.
 
     """
 
@@ -81,13 +256,24 @@ class Corpus:
         paths: list[Path],
         min_chars: int,
         ignore_front_matter: bool = False,
+        read_workers: int = 8,
+        mmap_min_size: int | None = None,
+        max_size: int | None = None,
+        encodings: list[str] | None = None,
+        splitter: Callable[[str, str], list[Section]] | None = None,
     ):
         self.paths = paths
         self.min_chars = min_chars
         self.ignore_front_matter = ignore_front_matter
+        self.read_workers = read_workers
+        self.mmap_min_size = mmap_min_size
+        self.max_size = max_size
+        self.encodings = encodings or []
+        self.splitter = splitter
 
         self.documents_: list[str] = []
         self.paths_: list[Path] = []
+        self.lines_: list[tuple[int, int]] = []
         self.reference_: str | None = None
 
         self.add_from_paths()
@@ -106,27 +292,141 @@ class Corpus:
             - If front matter stripping is enabled, the file content is stripped of its
               front matter before being added to the corpus.
         """
-        loaded_doc = try_read_file(path)
-        if loaded_doc and len(loaded_doc) >= self.min_chars:
-            if self.ignore_front_matter:
-                loaded_doc = self.strip_front_matter(loaded_doc, extension=path.suffix)
+        if self.splitter is not None and not is_reference:
+            sections = self.read_sections(path)
+            if sections is not None:
+                self._add_sections(path, sections)
+            return
+        loaded_doc = self.read(path)
+        if loaded_doc is not None:
             if is_reference:
                 self.reference_ = loaded_doc
-                if self.reference_ not in self.documents_:
+                if not self._contains(path, loaded_doc):
                     self.documents_.append(self.reference_)
             else:
                 self.documents_.append(loaded_doc)
                 self.paths_.append(path)
 
+    def _contains(self, path: Path, document: str) -> bool:
+        """Check whether the corpus has a document with the content of a file.
+
+        With a `splitter`, the documents are the sections of the files, so
+        the file is found if all of its sections follow each other.
+        """
+        if self.splitter is None:
+            return document in self.documents_
+        sections = self.read_sections(path)
+        if sections is None:
+            return False
+        texts = [section.text for section in sections]
+        return any(
+            text == texts[0] and self.documents_[i : i + len(texts)] == texts
+            for i, text in enumerate(self.documents_)
+        )
+
+    def read(self, path: Path) -> str | None:
+        """Read a file according to the corpus filtering rules.
+
+        Args:
+            path (Path): The path to the file.
+
+        Returns:
+            str | None: The file content (stripped of its front matter if
+                enabled), or None if the file is not a valid document.
+        """
+        loaded_doc = self._load(path)
+        if loaded_doc is not None and self.ignore_front_matter:
+            loaded_doc = self.strip_front_matter(loaded_doc, extension=path.suffix)
+        return loaded_doc
+
+    def read_sections(self, path: Path) -> list[Section] | None:
+        """Read a file and split it into sections.
+
+        The front matter is stripped from the whole document, if enabled,
+        before it is split, and the line ranges refer to the file itself.
+        Without a `splitter`, the whole document is a single section.
+
+        Args:
+            path (Path): The path to the file.
+
+        Returns:
+            list[Section] | None: The sections of the file, or None if the
+                file is not a valid document.
+        """
+        loaded_doc = self._load(path)
+        if loaded_doc is None:
+            return None
+        if self.splitter is None:
+            if self.ignore_front_matter:
+                loaded_doc = self.strip_front_matter(loaded_doc, extension=path.suffix)
+            return [Section(loaded_doc, 1, loaded_doc.count("\n") + 1)]
+        if self.ignore_front_matter:
+            loaded_doc = markup.blank_front_matter(loaded_doc, path.suffix)
+        sections = self.splitter(loaded_doc, path.suffix)
+        return [s for s in sections if s.text.strip()] or None
+
+    def _load(self, path: Path) -> str | None:
+        """Read a file, returning None if it is not a valid document."""
+        loaded_doc = try_read_file(
+            path,
+            mmap_min_size=self.mmap_min_size,
+            max_size=self.max_size,
+            encodings=self.encodings,
+        )
+        if profiling.enabled():
+            size = path.stat().st_size if loaded_doc is not None else 0
+            profiling.count(files_read=1, bytes_read=size)
+        if loaded_doc and len(loaded_doc) >= self.min_chars:
+            return loaded_doc
+        return None
+
     def add_from_query(self, query: str):
         self.documents_.append(query)
         self.reference_ = query
 
-    def add_from_paths(self) -> list[str | None]:
+    def add_from_paths(self):
         """Load document contents from the specified paths."""
-        return [self.add_from_file(p) for p in self.paths]
+        if self.splitter is not None:
+            for path, sections in self.read_many(self.paths, sections=True):
+                if sections is not None:
+                    self._add_sections(path, sections)
+            return
+        for path, document in self.read_many(self.paths):
+            if document is not None:
+                self.documents_.append(document)
+                self.paths_.append(path)
+
+    def _add_sections(self, path: Path, sections: list[Section]):
+        for section in sections:
+            self.documents_.append(section.text)
+            self.paths_.append(path)
+            self.lines_.append((section.start, section.end))
+
+    def read_many(
+        self, paths: Iterable[Path], sections: bool = False
+    ) -> Iterator[tuple[Path, str | list[Section] | None]]:
+        """Read files concurrently according to the corpus filtering rules.
+
+        The files are read and decoded by a pool of `read_workers` threads,
+        which hides the latency of slow (e.g. network) filesystems.
+
+        Args:
+            paths (Iterable[Path]): Paths of the files. They are consumed
+                lazily.
+            sections (bool, optional): Whether to return the sections of the
+                files, as returned by `read_sections`, instead of their
+                content. Defaults to False.
+
+        Yields:
+            tuple[Path, str | list[Section] | None]: Each path, in the same
+                order as `paths`, with its content as returned by `read` or
+                `read_sections`.
+        """
+        read = self.read_sections if sections else self.read
+        return map_ordered(
+            lambda path: (path, read(path)), paths, workers=self.read_workers
+        )
 
     def strip_front_matter(self, document: str, extension: str) -> str:
         """Strip front-matter from the loaded documents."""
-        markup = Markup(extension=extension)
-        return markup.strip_frontmatter(document)
+        return markup.strip_front_matter(document, extension)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+
+PROFILE_FORMATS = ["text", "json"]
+
+# Profiler of the current run, if profiling is enabled.
+_profiler: Profiler | None = None
+
+
+def _cpu_time() -> float:
+    """Return the CPU time of the process and of its finished children."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+def _peak_rss() -> int | None:
+    """Return the peak resident set size of the process in bytes."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows.
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """Statistics of the stages of a run.
+
+    Each stage records its wall time, its CPU time (including the worker
+    processes that finished during the stage), the peak resident set size of
+    the process at its end, and the counters reported by the hooks called
+    during the stage (see `count` and `record`).
+
+    Attributes:
+        stages (list[dict]): Statistics of each stage, in order.
+    """
+
+    def __init__(self):
+        self.stages: list[dict] = []
+        self._current: dict | None = None
+        # Files are read by several threads.
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        """Measure the code run in a `with` block as the stage `name`."""
+        stats: dict = {"stage": name}
+        self.stages.append(stats)
+        previous, self._current = self._current, stats
+        wall_start, cpu_start = time.perf_counter(), _cpu_time()
+        try:
+            yield stats
+        finally:
+            stats["wall_time"] = time.perf_counter() - wall_start
+            stats["cpu_time"] = _cpu_time() - cpu_start
+            stats["peak_rss"] = _peak_rss()
+            self._current = previous
+
+    def count(self, **counters: int):
+        """Add to the counters of the current stage."""
+        with self._lock:
+            if self._current is not None:
+                for name, value in counters.items():
+                    self._current[name] = self._current.get(name, 0) + value
+
+    def record(self, **values: int):
+        """Set values of the current stage, replacing the previous ones."""
+        with self._lock:
+            if self._current is not None:
+                self._current.update(values)
+
+    def report(self, format: str = "text") -> str:
+        """Format the statistics of the stages.
+
+        Args:
+            format (str, optional): "text" for one line per stage, or "json"
+                for a JSON object. Defaults to "text".
+
+        Returns:
+            str: The formatted statistics.
+        """
+        if format == "json":
+            return json.dumps({"stages": self.stages})
+        lines = []
+        for stats in self.stages:
+            fields = [
+                f"wall {stats['wall_time']:.3f} s",
+                f"cpu {stats['cpu_time']:.3f} s",
+            ]
+            if stats["peak_rss"] is not None:
+                fields.append(f"peak rss {stats['peak_rss'] / 2**20:.1f} MiB")
+            fields.extend(
+                f"{name} {value}"
+                for name, value in stats.items()
+                if name not in ("stage", "wall_time", "cpu_time", "peak_rss")
+            )
+            lines.append(f"{stats['stage']}: " + ", ".join(fields))
+        return "\n".join(lines)
+
+
+def enable() -> Profiler:
+    """Start profiling the current run."""
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    """Stop profiling."""
+    global _profiler
+    _profiler = None
+
+
+def enabled() -> bool:
+    """Check whether profiling is enabled, e.g. to skip computing counters."""
+    return _profiler is not None
+
+
+def stage(name: str) -> contextlib.AbstractContextManager:
+    """Measure a stage if profiling is enabled, or do nothing otherwise."""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.stage(name)
+
+
+def count(**counters: int):
+    """Add to the counters of the current stage, if profiling is enabled."""
+    if _profiler is not None:
+        _profiler.count(**counters)
+
+
+def record(**values: int):
+    """Set values of the current stage, if profiling is enabled."""
+    if _profiler is not None:
+        _profiler.record(**values)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import bisect
+import re
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from .constants import SECTION_MODES
+
+# Heading syntax by file extension. Elsewhere, a leading "*" is a list item
+# (e.g. in Markdown) and a leading "#" a comment (e.g. in shell scripts).
+ORG_HEADING_RE = re.compile(r"^\*+[ \t]", re.MULTILINE)
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,6}[ \t]", re.MULTILINE)
+HEADING_RES = {
+    ".org": ORG_HEADING_RE,
+    ".md": MARKDOWN_HEADING_RE,
+    ".markdown": MARKDOWN_HEADING_RE,
+}
+WORD_RE = re.compile(r"\S+")
+
+
+class Section(NamedTuple):
+    """A part of a document and the lines it spans (1-based, inclusive)."""
+
+    text: str
+    start: int
+    end: int
+
+
+def _line_starts(text: str) -> list[int]:
+    """Return the offset of the first character of every line."""
+    return [0] + [m.end() for m in re.finditer("\n", text)]
+
+
+def split_headings(text: str, extension: str) -> list[Section]:
+    """Split a document at its Org-mode or Markdown headings.
+
+    Each section starts at a heading and runs until the next heading. The
+    text before the first heading, if any, is a section of its own. Only the
+    heading syntax of the document's format is recognized, and documents of
+    other formats are kept whole.
+
+    Args:
+        text (str): Document to be split.
+        extension (str): File extension of the document, with the dot.
+
+    Returns:
+        list[Section]: The sections of the document, in order.
+    """
+    heading_re = HEADING_RES.get(extension.lower())
+    if heading_re is None:
+        return [Section(text, 1, text.count("\n") + 1)]
+    starts = [m.start() for m in heading_re.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    line_starts = _line_starts(text)
+    sections = []
+    for begin, end in zip(starts, starts[1:] + [len(text)]):
+        sections.append(
+            Section(
+                text[begin:end],
+                bisect.bisect_right(line_starts, begin),
+                bisect.bisect_right(line_starts, max(begin, end - 1)),
+            )
+        )
+    return sections
+
+
+def split_windows(text: str, size: int = 200, overlap: int = 50) -> list[Section]:
+    """Split a document in windows of words that overlap.
+
+    Args:
+        text (str): Document to be split.
+        size (int, optional): Number of words of each window. Defaults to 200.
+        overlap (int, optional): Number of words shared by consecutive
+            windows. Must be smaller than `size`. Defaults to 50.
+
+    Returns:
+        list[Section]: The windows of the document, in order.
+    """
+    if not 0 <= overlap < size:
+        raise ValueError("The overlap must be smaller than the window size.")
+    words = [(m.start(), m.end()) for m in WORD_RE.finditer(text)]
+    if not words:
+        return [Section(text, 1, text.count("\n") + 1)]
+    line_starts = _line_starts(text)
+    sections = []
+    step = size - overlap
+    for first in range(0, max(len(words) - overlap, 1), step):
+        begin = words[first][0]
+        end = words[min(first + size, len(words)) - 1][1]
+        sections.append(
+            Section(
+                text[begin:end],
+                bisect.bisect_right(line_starts, begin),
+                bisect.bisect_right(line_starts, end - 1),
+            )
+        )
+    return sections
+
+
+def make_splitter(
+    mode: str, size: int = 200, overlap: int = 50
+) -> Callable[[str, str], list[Section]]:
+    """Return the function that splits documents in the given mode.
+
+    The function takes the content of a document and its file extension.
+
+    Args:
+        mode (str): One of `SECTION_MODES`.
+        size (int, optional): Window size for the "window" mode.
+        overlap (int, optional): Window overlap for the "window" mode.
+    """
+    if mode == "headings":
+        return split_headings
+    if mode == "window":
+        if not 0 <= overlap < size:
+            raise ValueError("The overlap must be smaller than the window size.")
+        return lambda text, extension: split_windows(text, size=size, overlap=overlap)
+    raise ValueError(f"Unknown section mode '{mode}'. Use one of {SECTION_MODES}.")
+
+
+class FileSections:
+    """Mapping of sections, scored as separate documents, to their files.
+
+    Args:
+        paths (list[Path]): Path of the file of each section.
+        lines (list[tuple[int, int]]): Line range of each section.
+
+    Attributes:
+        files (list[Path]): Distinct files, in order of first appearance.
+    """
+
+    def __init__(self, paths: list[Path], lines: list[tuple[int, int]]):
+        positions: dict[Path, int] = {}
+        self.owners = np.array(
+            [positions.setdefault(p, len(positions)) for p in paths], dtype=np.intp
+        )
+        self.files = list(positions)
+        self.lines = lines
+
+    def max_pool(self, scores: np.ndarray) -> tuple[np.ndarray, list[tuple[int, int]]]:
+        """Score each file by its best section.
+
+        Args:
+            scores (np.ndarray): Score of each section. Scores beyond the
+                sections (e.g. an appended reference) are ignored.
+
+        Returns:
+            tuple[np.ndarray, list[tuple[int, int]]]: Score of each file and
+                line range of its best section, indexed like `files`.
+        """
+        scores = np.asarray(scores, dtype=float)[: len(self.owners)]
+        best = np.full(len(self.files), -np.inf)
+        np.maximum.at(best, self.owners, scores)
+        # The first section of each file reaching the best score of the file.
+        rows = np.flatnonzero(scores == best[self.owners])
+        _, first = np.unique(self.owners[rows], return_index=True)
+        return best, [tuple(self.lines[i]) for i in rows[first]]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import socket
+import socketserver
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .constants import FORMATTER_CLASSES
+
+if TYPE_CHECKING:
+    from .preprocessing import Corpus
+    from .sections import FileSections
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = {"output": self.server.search(request)}
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            response = {"error": str(e)}
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class Server(socketserver.UnixStreamServer):
+    """Unix socket server that answers queries with an already fitted model.
+
+    Each connection carries a single JSON request terminated by a newline and
+    gets a single JSON response back. See `request` for the client side.
+
+    Args:
+        socket_path (Path): Path of the Unix socket to listen on.
+        model: Fitted similarity model (see `ALGORITHM_CLASSES`).
+        targets (list[Path]): Paths of the documents the model was fitted on.
+        corpus (Corpus): Corpus whose filtering rules are used to read the
+            reference files.
+        directory (Path): Directory that was scanned for documents.
+        settings (dict): Options the model was built with. Requests made with
+            different settings are rejected, so that the client can fall back
+            to scoring the documents by itself.
+        sections (FileSections, optional): Files of the documents, if they
+            are sections of files. The files are then scored by their best
+            section. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        model: Any,
+        targets: list[Path],
+        corpus: Corpus,
+        directory: Path,
+        settings: dict[str, Any],
+        sections: FileSections | None = None,
+    ):
+        self.socket_path = socket_path
+        self.model = model
+        self.targets = targets
+        self.corpus = corpus
+        self.directory = directory
+        self.settings = settings
+        self.sections = sections
+
+        if socket_path.exists():
+            if request(socket_path, {}) is not None:
+                raise OSError(f"A server is already listening on {socket_path}")
+            socket_path.unlink()
+        super().__init__(str(socket_path), _RequestHandler)
+
+    def search(self, request: dict[str, Any]) -> str:
+        """Score the documents against a request and format the results.
+
+        Args:
+            request (dict): Must contain the client `settings`, either a
+                `reference_file` (absolute path) or a `query`, the `directory`
+                as passed by the client, the output `format` and the
+                `formatter` keyword arguments.
+
+        Returns:
+            str: The formatted results.
+        """
+        if request.get("settings") != self.settings:
+            raise ValueError("The server was started with different settings")
+        if request.get("reference_file"):
+            source = self.corpus.read(Path(request["reference_file"]))
+            if source is None:
+                raise ValueError(
+                    f"{request['reference_file']} could not be read as text"
+                )
+        else:
+            source = request["query"]
+        scores = self.model.get_scores(source=source)
+        targets = self.targets
+        lines = None
+        if self.sections is not None:
+            scores, lines = self.sections.max_pool(scores)
+            targets = self.sections.files
+
+        # Show the paths as if the client had scanned the directory itself.
+        client_directory = Path(request["directory"])
+        targets = [
+            client_directory / target.relative_to(self.directory) for target in targets
+        ]
+        formatter = FORMATTER_CLASSES[request["format"]](
+            targets=targets, scores=scores, lines=lines, **request["formatter"]
+        )
+        # Some formatters print the heading by themselves.
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            output = formatter.format()
+        return stdout.getvalue() + output
+
+    def serve(self):
+        """Handle requests until interrupted, then remove the socket."""
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            self.socket_path.unlink(missing_ok=True)
+
+
+def request(socket_path: Path, payload: dict[str, Any]) -> dict[str, Any] | None:
+    """Send a request to a running server.
+
+    Args:
+        socket_path (Path): Path of the server's Unix socket.
+        payload (dict): Request to be sent (see `Server.search`).
+
+    Returns:
+        dict | None: The server response, containing either an `output` or an
+            `error` key, or None if no server is listening on `socket_path`.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(socket_path))
+            sock.sendall((json.dumps(payload) + "\n").encode())
+            with sock.makefile("rb") as f:
+                response = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    if not response:
+        return None
+    return json.loads(response)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Arrays of a CSR matrix, stored as `<name>.<array>.npy` files.
+CSR_ARRAYS = ("data", "indices", "indptr")
+
+# Prefix of the directories holding the arrays of each saved generation.
+GENERATION_PREFIX = "gen-"
+
+
+@contextlib.contextmanager
+def _replace_atomically(path: Path, mode: str):
+    """Open a unique temporary file that replaces `path` once closed.
+
+    The temporary file is created in the same directory, so that it can be
+    renamed over `path`, and is removed if writing it fails.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def save_array(path: Path, array: np.ndarray):
+    """Write an array as a .npy file that `load_array` can memory-map.
+
+    The data of .npy files is aligned, so it can be mapped without a copy.
+    The file is replaced atomically: processes that mapped the previous
+    version keep reading it, and never see a partially written file.
+
+    Args:
+        path (Path): Path of the .npy file.
+        array (np.ndarray): Array to be written.
+    """
+    with _replace_atomically(path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+
+
+def load_array(path: Path, mmap_mode: str | None = "r") -> np.ndarray:
+    """Memory-map an array written by `save_array`.
+
+    Args:
+        path (Path): Path of the .npy file.
+        mmap_mode (str | None, optional): "r" for a read-only map, "c" for a
+            copy-on-write map, or None to read the array into memory.
+            Defaults to "r".
+    """
+    return np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+
+
+def save_json(path: Path, data: Any):
+    """Write a JSON file atomically (see `save_array`)."""
+    with _replace_atomically(path, "w") as f:
+        json.dump(data, f)
+
+
+def save_csr(directory: Path, name: str, matrix: csr_matrix):
+    """Write the arrays of a CSR matrix as .npy files (see `save_array`)."""
+    for array in CSR_ARRAYS:
+        save_array(directory / f"{name}.{array}.npy", getattr(matrix, array))
+
+
+def load_csr(
+    directory: Path,
+    name: str,
+    shape: tuple[int, int],
+    mmap_mode: str | None = "r",
+) -> csr_matrix | None:
+    """Memory-map a CSR matrix written by `save_csr`.
+
+    Only the pages of the arrays that are read, e.g. the rows used by a
+    sparse product, are loaded from disk, and the page cache is shared by
+    all the processes that map the same files.
+
+    Args:
+        directory (Path): Directory of the .npy files.
+        name (str): Name given to `save_csr`.
+        shape (tuple[int, int]): Shape of the matrix.
+        mmap_mode (str | None, optional): See `load_array`. Defaults to "r".
+
+    Returns:
+        csr_matrix | None: The matrix, or None if its files are missing or
+            do not match `shape`, e.g. because another process is replacing
+            them.
+    """
+    try:
+        data, indices, indptr = (
+            load_array(directory / f"{name}.{array}.npy", mmap_mode)
+            for array in CSR_ARRAYS
+        )
+    except (OSError, ValueError):
+        return None
+    if (
+        len(indptr) != shape[0] + 1
+        or len(data) != len(indices)
+        or indptr[-1] != len(indices)
+    ):
+        return None
+    return csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+def generation_directory(directory: Path, generation: str) -> Path:
+    """Return the directory of the arrays of a saved generation."""
+    return directory / (GENERATION_PREFIX + generation)
+
+
+def new_generation(directory: Path) -> tuple[str, Path]:
+    """Create the directory of a new generation of saved arrays.
+
+    Each save writes its arrays to a directory of its own, and then commits
+    them by atomically replacing a JSON file (e.g. the manifest of an index)
+    that names the generation. Readers follow that file, so they never pair
+    it with the arrays of another save, and concurrent saves never write to
+    the same files.
+
+    Args:
+        directory (Path): Directory where the generations are kept.
+
+    Returns:
+        tuple[str, Path]: Identifier and directory of the generation.
+    """
+    generation = uuid.uuid4().hex
+    path = generation_directory(directory, generation)
+    path.mkdir(parents=True)
+    return generation, path
+
+
+def remove_old_generations(directory: Path, generation: str):
+    """Remove the generations saved before `generation` was committed.
+
+    Processes that mapped the arrays of a removed generation keep reading
+    them. Generations that are newer than `generation`, e.g. being written by
+    another process, are kept. Files that cannot be removed (e.g. because
+    they are mapped on Windows) are left behind.
+
+    Args:
+        directory (Path): Directory where the generations are kept.
+        generation (str): Identifier of the committed generation.
+    """
+    current = generation_directory(directory, generation)
+    try:
+        committed = current.stat().st_mtime_ns
+    except OSError:
+        return
+    for path in directory.glob(GENERATION_PREFIX + "*"):
+        if path == current:
+            continue
+        try:
+            if path.stat().st_mtime_ns > committed:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
@@ -1,37 +1,322 @@
 from __future__ import annotations
 
-from typing import Iterable, Any
+import codecs
+import concurrent.futures
+import locale
+import mmap
+import os
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
 from pathlib import Path
+from typing import Any, Callable, TypeVar
 
+import numpy as np
 
-def try_read_file(filename: Path) -> str | None:
-    with filename.open() as f:
+from .gitignore import GitIgnore, translate
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Size of the first block of a file that is checked for binary content.
+SNIFF_SIZE = 8192
+
+# Bytes that are common in text files. Bytes from 0x80 are part of
+# multibyte characters in UTF-8.
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F})
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def is_binary(block: bytes) -> bool:
+    """Guess whether a block of bytes is binary content rather than text.
+
+    A block is binary if it contains a NUL byte, or if more than 30% of its
+    bytes are control characters that do not appear in text.
+    """
+    if b"\0" in block:
+        return True
+    return len(block.translate(None, _TEXT_BYTES)) > 0.3 * len(block)
+
+
+def try_read_file(
+    filename: Path,
+    mmap_min_size: int | None = None,
+    max_size: int | None = None,
+    encodings: Iterable[str] = (),
+) -> str | None:
+    """Read a text file, returning None if it is not a readable text file.
+
+    Only the first block of the file is read before deciding whether the file
+    is binary, so binary files are skipped without reading them entirely.
+    Text files are decoded with the encoding given by their byte order mark,
+    if any, or else with the locale encoding and then with each fallback
+    encoding until one succeeds. Newlines are translated as in text mode.
+
+    Args:
+        filename (Path): The path to the file.
+        mmap_min_size (int, optional): Files of at least this many bytes are
+            memory-mapped and decoded straight from the mapping, without
+            copying their bytes into memory first. Defaults to None (never).
+        max_size (int, optional): Files larger than this many bytes are
+            skipped. Defaults to None (no limit).
+        encodings (Iterable[str], optional): Fallback encodings tried when a
+            file cannot be decoded with the locale encoding. Defaults to ().
+
+    Returns:
+        str | None: The file content, or None if the file could not be read,
+            is too large, is binary or could not be decoded.
+    """
+    try:
+        with filename.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if max_size is not None and size > max_size:
+                return None
+            head = f.read(SNIFF_SIZE)
+            encoding = next((name for bom, name in _BOMS if head.startswith(bom)), None)
+            if encoding is None and is_binary(head):
+                return None
+            if encoding is not None:
+                encodings = [encoding]
+            else:
+                encodings = [locale.getpreferredencoding(False), *encodings]
+            if len(head) < SNIFF_SIZE:
+                return _decode(head, encodings)
+            if mmap_min_size is not None and size >= max(mmap_min_size, 1):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return _decode(data, encodings)
+            return _decode(head + f.read(), encodings)
+    except OSError:
+        return None
+
+
+def _decode(data, encodings: list[str]) -> str | None:
+    for encoding in encodings:
         try:
-            document = f.read()
-        except UnicodeDecodeError:
-            document = None
-    return document
+            text = codecs.decode(data, encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+    return None
+
+
+def map_ordered(
+    function: Callable[[T], R], items: Iterable[T], workers: int = 1
+) -> Iterator[R]:
+    """Apply a function to items in a pool of threads, yielding in order.
+
+    Unlike `ThreadPoolExecutor.map`, the items are consumed lazily: only a
+    few items per thread are submitted ahead of the result being yielded,
+    so the memory used does not grow with the number of items.
+
+    Args:
+        function (Callable): Function to apply to each item.
+        items (Iterable): Items to process.
+        workers (int, optional): Number of threads. If 1, the items are
+            processed in the current thread. Defaults to 1.
+
+    Yields:
+        The result of `function` for each item, in the order of `items`.
+    """
+    if workers <= 1:
+        yield from map(function, items)
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque[concurrent.futures.Future] = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def compress(data: Iterable[Any], selectors: Iterable[Any]) -> list[Any]:
     return [d for d, s in zip(data, selectors) if s]
 
 
+def top_k(scores: np.ndarray, k: int, threshold: float = -np.inf) -> np.ndarray:
+    """Select the indices of the highest scores.
+
+    Only the scores above the k-th largest one are sorted, so the cost is
+    linear in the number of scores plus k log k. Equal scores keep their
+    original order, as in a stable sort.
+
+    Args:
+        scores (np.ndarray): One-dimensional array of scores.
+        k (int): Maximum number of indices to return.
+        threshold (float, optional): Minimum score of the selected indices.
+            Defaults to -inf.
+
+    Returns:
+        np.ndarray: Indices of the selected scores, by descending score.
+    """
+    scores = np.asarray(scores)
+    candidates = np.flatnonzero(scores >= threshold)
+    if k <= 0:
+        return candidates[:0]
+    if len(candidates) > k:
+        values = scores[candidates]
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = candidates[values > kth]
+        ties = candidates[values == kth][: k - len(above)]
+        candidates = np.concatenate([above, ties])
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def _compile_patterns(patterns: Iterable[str]) -> Callable[[str, str], bool]:
+    """Compile filename patterns into a single matching function.
+
+    Patterns such as "*.txt" are looked up in a set of suffixes, and the other
+    patterns are combined into a single regular expression, so the cost of
+    matching a file does not depend on the number of patterns.
+
+    Returns:
+        Callable: Function taking the name and the relative path (in POSIX
+            form) of a file, and returning whether any pattern matches it.
+    """
+    suffixes = set()
+    name_patterns = []
+    path_patterns = []
+    for pattern in patterns:
+        if pattern.startswith("*.") and not any(c in pattern[1:] for c in "*?[/"):
+            suffixes.add(pattern[1:])
+        elif "/" in pattern:
+            path_patterns.append(translate(pattern))
+        else:
+            name_patterns.append(translate(pattern))
+    name_re = re.compile("|".join(name_patterns)) if name_patterns else None
+    path_re = re.compile("|".join(path_patterns)) if path_patterns else None
+
+    def matches(name: str, relative: str) -> bool:
+        dot = name.find(".")
+        while dot != -1:
+            if name[dot:] in suffixes:
+                return True
+            dot = name.find(".", dot + 1)
+        if name_re is not None and name_re.fullmatch(name):
+            return True
+        return path_re is not None and path_re.fullmatch(relative) is not None
+
+    return matches
+
+
+def iter_paths(
+    directory: Path,
+    extensions: list[str],
+    recursive: bool = False,
+    exclude: Iterable[str] = (),
+    gitignore: bool = False,
+) -> Iterator[Path]:
+    """Yields the file paths in a directory that match the given extensions.
+
+    The directory tree is walked once with `os.scandir`, whose entries tell
+    files from directories without extra system calls, and each file name is
+    matched against all the patterns at once. Each file is yielded once, even
+    if it matches several patterns, as soon as it is found. Symbolic links to
+    directories are not followed.
+
+    Args:
+        directory (Path): The directory to search in.
+        extensions (list[str]): A list of filename glob patterns to search
+            for. Example: "*.txt"
+        recursive (bool, optional): Whether to search for files in
+            subdirectories as well. Defaults to False.
+        exclude (Iterable[str], optional): Glob patterns of files and
+            directories to skip, matched against their name and their path
+            relative to `directory`. Example: "node_modules". Defaults to ().
+        gitignore (bool, optional): Whether to skip the files and
+            directories ignored by .gitignore files. Defaults to False.
+
+    Yields:
+        Path: The paths of the matching files.
+    """
+    matches = _compile_patterns(extensions)
+    exclude_re = (
+        re.compile("|".join(translate(pattern) for pattern in exclude))
+        if exclude
+        else None
+    )
+    # Patterns with a "/" can match files in subdirectories.
+    max_depth = None if recursive else max(p.count("/") for p in extensions)
+
+    stack = [(directory, "", 0, GitIgnore() if gitignore else None)]
+    while stack:
+        current, base, depth, ignore = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        if ignore is not None:
+            ignore = ignore.child(current, base)
+        subdirectories = []
+        for entry in entries:
+            name = entry.name
+            relative = f"{base}/{name}" if base else name
+            if exclude_re is not None and (
+                exclude_re.fullmatch(name) or exclude_re.fullmatch(relative)
+            ):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    if ignore is not None and ignore.ignores(relative, True):
+                        continue
+                    subdirectories.append((current / name, relative, depth + 1, ignore))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if not matches(name, relative):
+                continue
+            if ignore is not None and ignore.ignores(relative, False):
+                continue
+            yield current / name
+        stack.extend(reversed(subdirectories))
+
+
 def collect_paths(
-    directory: Path, extensions: list[str], recursive: bool = False
+    directory: Path,
+    extensions: list[str],
+    recursive: bool = False,
+    exclude: Iterable[str] = (),
+    gitignore: bool = False,
 ) -> list[Path]:
     """Collects file paths in a directory that match the given extensions.
 
     Args:
         directory (Path): The directory to search in.
-        extensions (list[str]): A list of file extensions to search for. The
-            extensions should not contain asterisks nor dots. Example: "txt"
+        extensions (list[str]): A list of filename glob patterns to search
+            for. Example: "*.txt"
         recursive (bool, optional): Whether to search for files in
             subdirectories as well. Defaults to False.
+        exclude (Iterable[str], optional): Glob patterns of files and
+            directories to skip. Defaults to ().
+        gitignore (bool, optional): Whether to skip the files and
+            directories ignored by .gitignore files. Defaults to False.
 
     Returns:
         list[Path]: A list of paths to the matching files.
     """
-    glob_func = directory.rglob if recursive else directory.glob
-    paths = [x for ext in extensions for x in glob_func(ext) if x.is_file()]
-    return paths
+    return list(
+        iter_paths(
+            directory,
+            extensions,
+            recursive=recursive,
+            exclude=exclude,
+            gitignore=gitignore,
+        )
+    )
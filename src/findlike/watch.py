@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Callable
+
+from .index import file_signature
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def _snapshot(paths: list[Path]) -> Snapshot:
+    """Return the signature of each path that exists."""
+    snapshot = {}
+    for path in paths:
+        try:
+            snapshot[str(path)] = file_signature(path)
+        except OSError:
+            continue
+    return snapshot
+
+
+def _changed(previous: Snapshot, current: Snapshot) -> list[Path]:
+    """Return the paths that were added, modified or deleted."""
+    return [
+        Path(key)
+        for key in sorted(previous.keys() | current.keys())
+        if previous.get(key) != current.get(key)
+    ]
+
+
+class Watcher:
+    """Poll a set of files and report the ones that change.
+
+    At every poll, the watched files and their directories are checked with
+    `os.stat`. Creating, deleting or renaming a file changes the modification
+    time of its directory, so the files are only listed again by calling
+    `scan` when a directory changed, or every `rescan_interval` seconds to
+    notice the files created in directories that had no watched files. A
+    burst of changes (e.g. an editor saving several buffers) is reported
+    only once, after the files stop changing for `debounce` seconds.
+
+    Args:
+        scan (Callable): Function returning the paths of the files to watch.
+        extra_paths (list[Path], optional): Additional files to watch, which
+            are not part of the paths returned by `scan`. Defaults to [].
+        directories (list[Path], optional): Directories to watch even if they
+            contain no watched files, e.g. the scanned directory itself.
+            Defaults to [].
+        interval (float, optional): Seconds between polls. Defaults to 1.0.
+        debounce (float, optional): Seconds without changes to wait before
+            reporting a change. Defaults to 0.5.
+        rescan_interval (float, optional): Maximum number of seconds between
+            two calls to `scan`. Defaults to 60.0.
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[], list[Path]],
+        extra_paths: list[Path] | None = None,
+        directories: list[Path] | None = None,
+        interval: float = 1.0,
+        debounce: float = 0.5,
+        rescan_interval: float = 60.0,
+    ):
+        self.scan = scan
+        self.extra_paths = extra_paths or []
+        self.directories = directories or []
+        self.interval = interval
+        self.debounce = debounce
+        self.rescan_interval = rescan_interval
+
+        self._paths: list[Path] = []
+        self._scanned_at = float("-inf")
+
+    def _poll(self, directories: Snapshot) -> tuple[Snapshot, Snapshot, Snapshot]:
+        """Return the signatures of the files, extra files and directories.
+
+        Args:
+            directories (Snapshot): Signatures of the directories at the
+                previous poll. The files are scanned again if they changed.
+        """
+        current = _snapshot([Path(key) for key in directories])
+        now = time.monotonic()
+        if current != directories or now - self._scanned_at >= self.rescan_interval:
+            self._paths = self.scan()
+            self._scanned_at = now
+            parents = dict.fromkeys(
+                [*self.directories, *(path.parent for path in self._paths)]
+            )
+            current = _snapshot(list(parents))
+        return _snapshot(self._paths), _snapshot(self.extra_paths), current
+
+    def changes(self) -> Iterator[list[Path]]:
+        """Block until the files change and yield the changed paths.
+
+        Yields:
+            list[Path]: Paths returned by `scan` that were added, modified or
+                deleted, once the changes settled. The list is empty if only
+                the `extra_paths` changed.
+        """
+        files, extra, directories = self._poll({})
+        while True:
+            time.sleep(self.interval)
+            current = self._poll(directories)
+            if current[:2] == (files, extra):
+                directories = current[2]
+                continue
+            # Wait until the files stop changing.
+            while True:
+                previous = current
+                time.sleep(self.debounce)
+                current = self._poll(previous[2])
+                if current[:2] == previous[:2]:
+                    break
+            changed = _changed(files, current[0])
+            files, extra, directories = current
+            yield changed
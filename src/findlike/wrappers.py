@@ -1,70 +1,748 @@
 from __future__ import annotations
 
-import concurrent.futures
-from rank_bm25 import BM25Okapi
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from .preprocessing import Processor
-from functools import partial
+import json
+from pathlib import Path
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from . import profiling
+from .parallel import count_terms, count_tokens, hash_documents, tokenize_documents
+from .storage import (
+    generation_directory,
+    load_array,
+    load_csr,
+    new_generation,
+    remove_old_generations,
+    save_array,
+    save_csr,
+    save_json,
+)
+
+# scikit-learn is imported by the TF-IDF models only, because importing it
+# takes longer than most BM25 searches.
+
+# Files of a saved TF-IDF model.
+MODEL_FILE = "model.json"
+POSTINGS_NAME = "postings"
+NORMS_FILE = "norms.npy"
+IDF_FILE = "idf.npy"
+EMBEDDINGS_NAME = "embeddings"
+PROJECTION_FILE = "projection.npy"
+CENTROIDS_FILE = "centroids.npy"
+LIST_OFFSETS_FILE = "list_offsets.npy"
+LIST_DOCUMENTS_FILE = "list_documents.npy"
+
+
+def _row_norms(matrix: csr_matrix) -> np.ndarray:
+    """Return the L2 norm of each row of a sparse matrix."""
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
 
-def _process_doc(processor: Processor, doc: str) -> list[str]:
-    cleaned = processor.preprocessor(doc)
-    return processor.tokenizer(cleaned)
 
 class Tfidf:
     """Scikit-learn's TF-IDF wrapper.
 
     Args:
         processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        **kwargs: Keyword arguments passed on to scikit-learn's
+            `TfidfTransformer`.
 
     Attributes:
         source_embeddings_: Reference content embeddings.
         target_embeddings_: Scanned files embeddings.
     """
 
-    def __init__(self, processor, **kwargs):
+    def __init__(self, processor, jobs: int = 1, **kwargs):
         self.processor = processor
+        self.jobs = jobs
 
-        self._vectorizer = TfidfVectorizer(
-            tokenizer=self.processor.tokenizer,
-            preprocessor=self.processor.preprocessor,
-            token_pattern=None,
-            **kwargs,
-        )
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        self._transformer = TfidfTransformer(**kwargs)
+        self._postings = None
+        self._norms = None
+
+    def _make_vectorizer(self, vocabulary: dict[str, int] | None = None):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        return CountVectorizer(analyzer=self.processor.analyze, vocabulary=vocabulary)
 
     def fit(self, documents: list[str]):
-        self.target_embeddings_ = self._vectorizer.fit_transform(documents)
+        token_ids, vocabulary = tokenize_documents(
+            self.processor, documents, jobs=self.jobs
+        )
+        self.fit_counts(count_tokens(token_ids, len(vocabulary)), vocabulary)
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: dict[str, int]):
+        """Fit the model from precomputed term counts.
+
+        Args:
+            counts (csr_matrix): Term counts, one row per document.
+            vocabulary (dict[str, int]): Mapping of terms to column indices.
+        """
+        self._vectorizer = self._make_vectorizer(vocabulary=vocabulary)
+        self.target_embeddings_ = self._transformer.fit_transform(counts)
+        self._postings = None
+        self._norms = None
+        profiling.record(documents=counts.shape[0], vocabulary=len(vocabulary))
+
+    def _params(self) -> dict:
+        """Return the parameters that a saved model must have been fitted with."""
+        return {"model": type(self).__name__, **self._transformer.get_params()}
+
+    def save(self, directory: Path, tag: str = ""):
+        """Write the fitted model as raw arrays that `load` can memory-map.
+
+        The posting lists of the document embeddings (see
+        `_cosine_similarity`), the norms of the documents and the IDF of the
+        terms are written as .npy files to the directory of a new generation,
+        which the model metadata then points to, like the manifest of an
+        index.
+
+        Args:
+            directory (Path): Directory where the model files are written.
+            tag (str, optional): Identifier of the data the model was fitted
+                on, which `load` checks. Defaults to "".
+        """
+        generation, arrays_directory = new_generation(directory)
+        self._save_arrays(arrays_directory)
+        if self._transformer.use_idf:
+            save_array(arrays_directory / IDF_FILE, self._transformer.idf_)
+        metadata = {
+            "tag": tag,
+            "generation": generation,
+            "params": self._params(),
+            "shape": [len(self._norms), self._transformer.n_features_in_],
+        }
+        save_json(directory / MODEL_FILE, metadata)
+        remove_old_generations(directory, generation)
+
+    def load(self, directory: Path, vocabulary: dict[str, int], tag: str = "") -> bool:
+        """Memory-map a model written by `save`, instead of fitting it.
+
+        Scoring a source only reads the postings of its terms from disk, and
+        the pages read are shared by all the processes that load the model.
+        The document embeddings themselves are not loaded, so
+        `target_embeddings_` and `get_document_scores` are not available.
+
+        Args:
+            directory (Path): Directory given to `save`.
+            vocabulary (dict[str, int]): Mapping of terms to column indices
+                of the counts the model was fitted on.
+            tag (str, optional): Identifier given to `save`. Defaults to "".
+
+        Returns:
+            bool: True if a model with the same parameters and tag was found.
+        """
+        try:
+            with (directory / MODEL_FILE).open() as f:
+                metadata = json.load(f)
+            if metadata["tag"] != tag or metadata["params"] != self._params():
+                return False
+            n_documents, n_terms = metadata["shape"]
+            directory = generation_directory(directory, metadata["generation"])
+            idf = (
+                load_array(directory / IDF_FILE) if self._transformer.use_idf else None
+            )
+            if not self._load_arrays(directory, n_documents, n_terms):
+                return False
+        except (OSError, ValueError, KeyError):
+            return False
+
+        self._vectorizer = self._make_vectorizer(vocabulary=vocabulary)
+        if idf is not None:
+            self._transformer.idf_ = idf
+        self._transformer.n_features_in_ = n_terms
+        profiling.record(documents=n_documents, vocabulary=len(vocabulary))
+        return True
+
+    def _save_arrays(self, directory: Path):
+        """Write the arrays used to score sources (see `save`)."""
+        self._build_postings()
+        save_csr(directory, POSTINGS_NAME, self._postings)
+        save_array(directory / NORMS_FILE, self._norms)
+
+    def _load_arrays(self, directory: Path, n_documents: int, n_terms: int) -> bool:
+        """Memory-map the arrays written by `_save_arrays`.
+
+        Returns:
+            bool: True if the arrays were found and have the expected shapes.
+        """
+        postings = load_csr(directory, POSTINGS_NAME, shape=(n_terms, n_documents))
+        norms = load_array(directory / NORMS_FILE)
+        if postings is None or len(norms) != n_documents:
+            return False
+        self._postings = postings
+        self._norms = norms
+        self.__dict__.pop("target_embeddings_", None)
+        return True
+
+    def _build_postings(self):
+        """Store the document embeddings as posting lists, with their norms."""
+        if self._postings is None:
+            self._postings = csr_matrix(self.target_embeddings_.T)
+            self._norms = _row_norms(self.target_embeddings_)
+
+    def _cosine_similarity(self, embeddings: csr_matrix) -> np.ndarray:
+        """Compute the cosine similarity of `embeddings` to the documents.
+
+        The document embeddings are stored once with one row per term, i.e.
+        as the posting lists of an inverted index, so a product only reads
+        the postings of the terms that `embeddings` contain instead of every
+        document. The products are then divided by the document norms.
+        """
+        from sklearn.preprocessing import normalize
+
+        self._build_postings()
+        products = (normalize(embeddings) @ self._postings).toarray()
+        return np.divide(
+            products, self._norms, out=np.zeros_like(products), where=self._norms > 0
+        )
 
     def get_scores(self, source: str):
-        self.reference_embeddings_ = self._vectorizer.transform([source])
-        scores = cosine_similarity(
-            self.reference_embeddings_, self.target_embeddings_
-        ).flatten()
+        source_counts = self._vectorizer.transform([source])
+        self.reference_embeddings_ = self._transformer.transform(source_counts)
+        scores = self._cosine_similarity(self.reference_embeddings_).flatten()
+        return scores
+
+    def get_scores_batch(self, sources: list[str]) -> np.ndarray:
+        """Score several sources at once.
+
+        Args:
+            sources (list[str]): Source texts.
+
+        Returns:
+            np.ndarray: Scores matrix, with one row per source.
+        """
+        source_counts = self._vectorizer.transform(sources)
+        source_embeddings = self._transformer.transform(source_counts)
+        return self._cosine_similarity(source_embeddings)
+
+    def get_document_scores(self, rows: list[int]) -> np.ndarray:
+        """Score the fitted documents at `rows` against all fitted documents.
+
+        Args:
+            rows (list[int]): Indices of the documents used as sources.
+
+        Returns:
+            np.ndarray: Scores matrix, with one row per source document.
+        """
+        return self._cosine_similarity(self.target_embeddings_[rows])
+
+
+class HashedTfidf(Tfidf):
+    """TF-IDF wrapper with feature hashing.
+
+    Terms are mapped to a fixed number of columns by hashing them, as
+    scikit-learn's `HashingVectorizer` does, instead of being looked up in a
+    vocabulary. The memory used does not grow with the number of distinct
+    terms, and documents are vectorized independently of each other, at the
+    cost of the occasional collision of two terms in the same column.
+
+    Args:
+        processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        n_features (int, optional): Number of hash buckets (columns).
+            Defaults to 2**20.
+        **kwargs: Keyword arguments passed on to scikit-learn's
+            `TfidfTransformer`.
+    """
+
+    def __init__(self, processor, jobs: int = 1, n_features: int = 2**20, **kwargs):
+        super().__init__(processor, jobs=jobs, **kwargs)
+        self.n_features = n_features
+
+    def _make_vectorizer(self, vocabulary: dict[str, int] | None = None):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        return HashingVectorizer(
+            analyzer=self.processor.analyze,
+            n_features=self.n_features,
+            alternate_sign=False,
+            norm=None,
+        )
+
+    def _params(self) -> dict:
+        return {**super()._params(), "n_features": self.n_features}
+
+    def fit(self, documents: list[str]):
+        # Hash the tokens directly, without building a vocabulary.
+        counts = hash_documents(
+            self.processor, documents, n_features=self.n_features, jobs=self.jobs
+        )
+        self.fit_counts(counts, {})
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: dict[str, int]):
+        """Fit the model from precomputed term counts.
+
+        The counts of each term are moved to the hash bucket of the term,
+        unless the columns already are the hash buckets.
+
+        Args:
+            counts (csr_matrix): Term counts, one row per document.
+            vocabulary (dict[str, int]): Mapping of terms to column indices,
+                or an empty mapping if the terms were counted in hash buckets
+                (see `parallel.hash_documents`).
+        """
+        if not vocabulary:
+            self._vectorizer = self._make_vectorizer()
+            self.target_embeddings_ = self._transformer.fit_transform(counts)
+            self._postings = None
+            self._norms = None
+            profiling.record(documents=counts.shape[0])
+            return
+
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        terms = [""] * len(vocabulary)
+        for term, column in vocabulary.items():
+            terms[column] = term
+        hasher = HashingVectorizer(
+            analyzer=lambda term: [term],
+            n_features=self.n_features,
+            alternate_sign=False,
+            norm=None,
+        )
+        # Each term is hashed to a single bucket.
+        buckets = hasher.transform(terms).indices
+        mapping = csr_matrix(
+            (np.ones(len(terms)), (np.arange(len(terms)), buckets)),
+            shape=(len(terms), self.n_features),
+        )
+        super().fit_counts(csr_matrix(counts) @ mapping, vocabulary)
+
+
+class ApproximateTfidf(Tfidf):
+    """TF-IDF wrapper with approximate nearest neighbor search.
+
+    The documents are grouped in clusters, as in an inverted file (IVF)
+    index, and each source is only compared with the documents of the
+    `n_probes` clusters closest to it. Their scores are the exact cosine
+    similarities, and the documents of the other clusters get a score of 0,
+    so the cost of a search depends on the size of the probed clusters
+    rather than on the size of the corpus.
+
+    The clusters are found by spherical k-means on the document embeddings
+    reduced to `n_components` dimensions by a randomized SVD. Both are fitted
+    on a sample of the documents, and every document is then assigned to the
+    cluster with the closest centroid.
+
+    Args:
+        processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        n_components (int, optional): Number of dimensions of the reduced
+            embeddings. Defaults to 128.
+        n_lists (int | None, optional): Number of clusters. Defaults to the
+            square root of the number of documents.
+        n_probes (int, optional): Number of clusters searched for each
+            source. More probes find more of the most similar documents, but
+            take longer. Defaults to 8.
+        sample_size (int, optional): Maximum number of documents used to fit
+            the SVD and the clusters. Defaults to 50000.
+        random_state (int, optional): Seed of the sampling, the SVD and the
+            clustering. Defaults to 0.
+        **kwargs: Keyword arguments passed on to scikit-learn's
+            `TfidfTransformer`.
+
+    Attributes:
+        projection_ (np.ndarray): Reduced embedding of each term, one row per
+            term.
+        centroids_ (np.ndarray): Unit-length centroid of each cluster.
+        list_offsets_ (np.ndarray): The documents of cluster `i` are
+            `list_documents_[list_offsets_[i] : list_offsets_[i + 1]]`.
+        list_documents_ (np.ndarray): Indices of the documents, sorted by
+            cluster.
+    """
+
+    def __init__(
+        self,
+        processor,
+        jobs: int = 1,
+        n_components: int = 128,
+        n_lists: int | None = None,
+        n_probes: int = 8,
+        sample_size: int = 50000,
+        random_state: int = 0,
+        **kwargs,
+    ):
+        super().__init__(processor, jobs=jobs, **kwargs)
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.n_probes = n_probes
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+    def _params(self) -> dict:
+        # The number of probes is only used at search time.
+        return {
+            **super()._params(),
+            "n_components": self.n_components,
+            "n_lists": self.n_lists,
+            "sample_size": self.sample_size,
+            "random_state": self.random_state,
+        }
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: dict[str, int]):
+        """Fit the model from precomputed term counts.
+
+        Args:
+            counts (csr_matrix): Term counts, one row per document.
+            vocabulary (dict[str, int]): Mapping of terms to column indices.
+        """
+        from sklearn.preprocessing import normalize
+        from sklearn.utils.extmath import randomized_svd
+
+        super().fit_counts(counts, vocabulary)
+        embeddings = csr_matrix(self.target_embeddings_)
+        self._norms = _row_norms(embeddings)
+        n_documents, n_terms = embeddings.shape
+        rng = np.random.default_rng(self.random_state)
+        sample = np.sort(
+            rng.choice(
+                n_documents, size=min(n_documents, self.sample_size), replace=False
+            )
+        )
+        sample_embeddings = normalize(embeddings[sample]).astype(np.float32)
+
+        n_components = min(self.n_components, *sample_embeddings.shape)
+        if n_components > 0:
+            _, _, components = randomized_svd(
+                sample_embeddings,
+                n_components,
+                n_iter=2,
+                random_state=self.random_state,
+            )
+            self.projection_ = np.ascontiguousarray(components.T, dtype=np.float32)
+        else:
+            self.projection_ = np.zeros((n_terms, 1), dtype=np.float32)
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_documents)))
+        self.centroids_ = _spherical_kmeans(
+            self._reduce(sample_embeddings), min(n_lists, max(len(sample), 1)), rng
+        )
+        labels = np.concatenate(
+            [
+                np.argmax(
+                    self._reduce(embeddings[start : start + 4096]) @ self.centroids_.T,
+                    axis=1,
+                )
+                for start in range(0, n_documents, 4096)
+            ]
+            or [np.zeros(0, dtype=np.intp)]
+        )
+        self.list_documents_ = np.argsort(labels, kind="stable").astype(np.int32)
+        self.list_offsets_ = np.zeros(len(self.centroids_) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(labels, minlength=len(self.centroids_)),
+            out=self.list_offsets_[1:],
+        )
+        profiling.record(clusters=len(self.centroids_))
+
+    def _reduce(self, embeddings: csr_matrix) -> np.ndarray:
+        """Project embeddings on the reduced dimensions, with unit length."""
+        from sklearn.preprocessing import normalize
+
+        # With the same dtype, only the rows of the terms are read, instead of
+        # converting the whole projection.
+        embeddings = embeddings.astype(self.projection_.dtype)
+        return normalize(np.asarray(embeddings @ self.projection_))
+
+    def _cosine_similarity(self, embeddings: csr_matrix) -> np.ndarray:
+        """Compute the cosine similarity of `embeddings` to the documents of
+        the closest clusters, and 0 for the other documents."""
+        from sklearn.preprocessing import normalize
+
+        embeddings = csr_matrix(normalize(embeddings))
+        scores = np.zeros((embeddings.shape[0], len(self._norms)))
+        n_probes = min(self.n_probes, len(self.centroids_))
+        if n_probes < 1:
+            return scores
+        closeness = self._reduce(embeddings) @ self.centroids_.T
+        probes = np.argpartition(-closeness, n_probes - 1, axis=1)[:, :n_probes]
+        for i, lists in enumerate(probes):
+            candidates = np.concatenate(
+                [
+                    self.list_documents_[
+                        self.list_offsets_[j] : self.list_offsets_[j + 1]
+                    ]
+                    for j in lists
+                ]
+            )
+            source = np.zeros(embeddings.shape[1])
+            row = embeddings[i]
+            source[row.indices] = row.data
+            products = self.target_embeddings_[candidates] @ source
+            norms = self._norms[candidates]
+            scores[i, candidates] = np.divide(
+                products, norms, out=np.zeros_like(products), where=norms > 0
+            )
         return scores
 
+    def _save_arrays(self, directory: Path):
+        save_csr(directory, EMBEDDINGS_NAME, csr_matrix(self.target_embeddings_))
+        save_array(directory / NORMS_FILE, self._norms)
+        save_array(directory / PROJECTION_FILE, self.projection_)
+        save_array(directory / CENTROIDS_FILE, self.centroids_)
+        save_array(directory / LIST_OFFSETS_FILE, self.list_offsets_)
+        save_array(directory / LIST_DOCUMENTS_FILE, self.list_documents_)
+
+    def _load_arrays(self, directory: Path, n_documents: int, n_terms: int) -> bool:
+        """Memory-map the arrays written by `_save_arrays`.
+
+        Unlike `Tfidf`, the document embeddings are loaded, because the
+        candidates of a search are scored with them.
+        """
+        embeddings = load_csr(directory, EMBEDDINGS_NAME, shape=(n_documents, n_terms))
+        norms = load_array(directory / NORMS_FILE)
+        projection = load_array(directory / PROJECTION_FILE)
+        centroids = load_array(directory / CENTROIDS_FILE)
+        list_offsets = load_array(directory / LIST_OFFSETS_FILE)
+        list_documents = load_array(directory / LIST_DOCUMENTS_FILE)
+        if (
+            embeddings is None
+            or len(norms) != n_documents
+            or len(projection) != n_terms
+            or len(list_offsets) != len(centroids) + 1
+            or len(list_documents) != n_documents
+        ):
+            return False
+        self.target_embeddings_ = embeddings
+        self._norms = norms
+        self.projection_ = projection
+        self.centroids_ = centroids
+        self.list_offsets_ = list_offsets
+        self.list_documents_ = list_documents
+        return True
+
+
+def _spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    rng: np.random.Generator,
+    n_iter: int = 10,
+) -> np.ndarray:
+    """Cluster unit-length vectors by cosine similarity.
+
+    Args:
+        vectors (np.ndarray): Vectors to be clustered, one per row.
+        n_clusters (int): Number of clusters, at most the number of vectors.
+        rng (np.random.Generator): Generator used to pick the initial
+            centroids among the vectors.
+        n_iter (int, optional): Number of iterations. Defaults to 10.
+
+    Returns:
+        np.ndarray: Unit-length centroid of each cluster, one per row.
+    """
+    from sklearn.preprocessing import normalize
+
+    centroids = vectors[rng.choice(len(vectors), size=n_clusters, replace=False)]
+    for _ in range(n_iter):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        members = csr_matrix(
+            (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+            shape=(n_clusters, len(vectors)),
+        )
+        sums = np.asarray(members @ vectors)
+        # Empty clusters keep their centroid.
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = normalize(sums)
+    return centroids.astype(np.float32)
+
 
 class BM25:
-    """Okapi BM25 wrapper.
+    """Okapi BM25 similarity model.
+
+    The documents are stored as a sparse matrix of term weights, with one row
+    per term, in which the IDF and the document length normalization are
+    precomputed. Scoring a source text is then a single sparse product of its
+    term counts with this matrix, which only reads the rows of the terms that
+    the source contains.
+
+    The scores are the same as those of `rank_bm25.BM25Okapi`, including the
+    floor of `epsilon` times the average IDF for terms that appear in more
+    than half of the documents.
 
     Args:
         processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Document length normalization. Defaults to 0.75.
+        epsilon (float, optional): IDF floor, as a fraction of the average
+            IDF. Defaults to 0.25.
 
     Attributes:
-        tokenized_documents_ (list[str]): List of tokens.
+        idf_ (np.ndarray): IDF of each term of the vocabulary.
+        weights_ (csr_matrix): Term weights, one row per term and one column
+            per document.
+        counts_ (csr_matrix): Term counts of the fitted documents.
+        vocabulary_ (dict[str, int]): Mapping of terms to rows of `weights_`.
     """
 
-    def __init__(self, processor):
+    def __init__(
+        self,
+        processor,
+        jobs: int = 1,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ):
         self.processor = processor
+        self.jobs = jobs
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
 
     def fit(self, documents: list[str]):
-        process_doc = partial(_process_doc, self.processor)
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            self.tokenized_documents_ = list(executor.map(process_doc, documents))
+        token_ids, vocabulary = tokenize_documents(
+            self.processor, documents, jobs=self.jobs
+        )
+        self.fit_counts(count_tokens(token_ids, len(vocabulary)), vocabulary)
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: dict[str, int]):
+        """Fit the model from precomputed term counts.
 
-        self._model = BM25Okapi(self.tokenized_documents_)
+        Args:
+            counts (csr_matrix): Term counts, one row per document.
+            vocabulary (dict[str, int]): Mapping of terms to column indices.
+        """
+        self.vocabulary_ = vocabulary
+        counts = csr_matrix(counts)
+        counts.sum_duplicates()
+        n_documents, n_terms = counts.shape
+
+        doc_lengths = np.asarray(counts.sum(axis=1), dtype=float).ravel()
+        avgdl = doc_lengths.mean() if n_documents else 0.0
+        norms = 1 - self.b + self.b * doc_lengths / (avgdl or 1.0)
+
+        frequencies = np.bincount(counts.indices, minlength=n_terms)
+        self.idf_ = self._idf(frequencies, n_documents)
+
+        # Length normalization of the document of each nonzero count.
+        row_norms = np.repeat(norms, np.diff(counts.indptr))
+        tf = counts.data.astype(float)
+        weights = self.idf_[counts.indices] * self._saturate(tf, row_norms)
+        self.weights_ = csr_matrix(
+            (weights, counts.indices, counts.indptr), shape=counts.shape
+        ).T.tocsr()
+        self.counts_ = counts
+        profiling.record(documents=n_documents, vocabulary=n_terms)
+
+    def _idf(self, frequencies: np.ndarray, n_documents: int) -> np.ndarray:
+        """Compute the IDF of each term from its document frequency."""
+        present = frequencies > 0
+        idf = np.zeros(len(frequencies))
+        idf[present] = np.log(n_documents - frequencies[present] + 0.5) - np.log(
+            frequencies[present] + 0.5
+        )
+        if present.any():
+            floor = self.epsilon * idf[present].mean()
+            idf[present & (idf < 0)] = floor
+        return idf
+
+    def _saturate(self, tf: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """Compute the term frequency component of the weights."""
+        return tf * (self.k1 + 1) / (tf + self.k1 * norms)
 
     def get_scores(self, source: str):
-        clean_source = self.processor.preprocessor(source)
-        tokenized_source = self.processor.tokenizer(clean_source)
-        scores = self._model.get_scores(tokenized_source)
-        return scores
+        return self.get_scores_batch([source])[0]
+
+    def get_scores_batch(self, sources: list[str]) -> np.ndarray:
+        """Score several sources at once.
+
+        Args:
+            sources (list[str]): Source texts.
+
+        Returns:
+            np.ndarray: Scores matrix, with one row per source.
+        """
+        source_counts = count_terms(self.processor, sources, self.vocabulary_)
+        return (source_counts @ self.weights_).toarray()
+
+    def get_document_scores(self, rows: list[int]) -> np.ndarray:
+        """Score the fitted documents at `rows` against all fitted documents.
+
+        Args:
+            rows (list[int]): Indices of the documents used as sources.
+
+        Returns:
+            np.ndarray: Scores matrix, with one row per source document.
+        """
+        return (self.counts_[rows] @ self.weights_).toarray()
+
+
+class BM25L(BM25):
+    """BM25L similarity model.
+
+    BM25L shifts the length-normalized term frequency by `delta`, so that
+    long documents are not overly penalized (Lv and Zhai, 2011).
+
+    Args:
+        processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Document length normalization. Defaults to 0.75.
+        delta (float, optional): Term frequency shift. Defaults to 0.5.
+    """
+
+    def __init__(
+        self,
+        processor,
+        jobs: int = 1,
+        k1: float = 1.5,
+        b: float = 0.75,
+        delta: float = 0.5,
+    ):
+        super().__init__(processor, jobs=jobs, k1=k1, b=b)
+        self.delta = delta
+
+    def _idf(self, frequencies: np.ndarray, n_documents: int) -> np.ndarray:
+        return np.log(n_documents + 1) - np.log(frequencies + 0.5)
+
+    def _saturate(self, tf: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        shifted = tf / norms + self.delta
+        return (self.k1 + 1) * shifted / (self.k1 + shifted)
+
+
+class BM25Plus(BM25):
+    """BM25+ similarity model.
+
+    BM25+ adds `delta` to the weight of every term that a document contains,
+    so that matching a term in a long document always scores more than not
+    matching it (Lv and Zhai, 2011).
+
+    Args:
+        processor (Processor): Processor object.
+        jobs (int, optional): Number of processes used to tokenize the
+            documents, where 0 means all CPUs. Defaults to 1.
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Document length normalization. Defaults to 0.75.
+        delta (float, optional): Lower bound of the term frequency
+            component. Defaults to 1.0.
+    """
+
+    def __init__(
+        self,
+        processor,
+        jobs: int = 1,
+        k1: float = 1.5,
+        b: float = 0.75,
+        delta: float = 1.0,
+    ):
+        super().__init__(processor, jobs=jobs, k1=k1, b=b)
+        self.delta = delta
+
+    def _idf(self, frequencies: np.ndarray, n_documents: int) -> np.ndarray:
+        with np.errstate(divide="ignore"):
+            idf = np.log((n_documents + 1) / frequencies)
+        idf[frequencies == 0] = 0.0
+        return idf
+
+    def _saturate(self, tf: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        return tf * (self.k1 + 1) / (self.k1 * norms + tf) + self.delta
@@ -1,11 +1,13 @@
+import mmap
 import tempfile
 from pathlib import Path
 from textwrap import dedent
 
 import pytest
 
+from findlike import utils
 from findlike.preprocessing import Corpus
-from findlike.utils import try_read_file
+from findlike.utils import SNIFF_SIZE, try_read_file
 
 
 @pytest.fixture
@@ -47,8 +49,90 @@ def test_try_read_file(sample_paths):
     assert document is not None
 
     # Test reading an invalid file
-    with pytest.raises(FileNotFoundError):
-        try_read_file(invalid_path)
+    assert try_read_file(invalid_path) is None
+
+
+@pytest.fixture
+def mmap_calls(monkeypatch):
+    calls = []
+    original = mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(utils.mmap, "mmap", tracking_mmap)
+    return calls
+
+
+def test_try_read_file_mmap(tmp_path, mmap_calls):
+    path = tmp_path / "crlf.txt"
+    # The file is larger than the sniffed block, which ends with a "\r".
+    line = "Second line é\r\n"
+    head = "x" * (SNIFF_SIZE - 1) + "\r\n"
+    path.write_bytes((head + line * 1000).encode())
+    expected = "x" * (SNIFF_SIZE - 1) + "\n" + "Second line é\n" * 1000
+    assert try_read_file(path) == expected
+    assert not mmap_calls
+    assert try_read_file(path, mmap_min_size=SNIFF_SIZE * 10) == expected
+    assert not mmap_calls
+    assert try_read_file(path, mmap_min_size=1) == expected
+    assert len(mmap_calls) == 1
+
+
+def test_try_read_file_invalid_text(tmp_path, mmap_calls):
+    path = tmp_path / "latin1.txt"
+    # The first block is valid UTF-8, and the invalid bytes come after it.
+    path.write_bytes(b"text " * SNIFF_SIZE + b"caf\xe9 \xff\x81 text")
+    assert try_read_file(path) is None
+    assert try_read_file(path, mmap_min_size=1) is None
+    assert len(mmap_calls) == 1
+    assert try_read_file(path, mmap_min_size=1, encodings=["latin-1"]).endswith(
+        "café ÿ\x81 text"
+    )
+
+
+def test_try_read_file_binary(tmp_path):
+    path = tmp_path / "image.txt"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00" + b"text " * 10000)
+    assert try_read_file(path) is None
+    path.write_bytes(bytes(range(1, 32)) * 10)
+    assert try_read_file(path) is None
+
+
+def test_try_read_file_max_size(tmp_path):
+    path = tmp_path / "large.txt"
+    path.write_text("word " * 100)
+    assert try_read_file(path, max_size=500) is not None
+    assert try_read_file(path, max_size=499) is None
+
+
+def test_try_read_file_encodings(tmp_path):
+    path = tmp_path / "latin1.txt"
+    path.write_bytes("Café crème".encode("cp1252"))
+    assert try_read_file(path) is None
+    assert try_read_file(path, encodings=["cp1252"]) == "Café crème"
+
+    path = tmp_path / "utf16.txt"
+    path.write_bytes("Café\r\ncrème".encode("utf-16"))
+    assert try_read_file(path) == "Café\ncrème"
+
+    path = tmp_path / "bom.txt"
+    path.write_bytes("Café".encode("utf-8-sig"))
+    assert try_read_file(path) == "Café"
+
+
+@pytest.mark.parametrize("read_workers", [1, 4])
+def test_read_workers_keep_order(tmp_path, read_workers):
+    paths = []
+    for i in range(50):
+        path = tmp_path / f"doc{i:02d}.txt"
+        path.write_text(f"Document number {i} " * (i % 3 + 1))
+        paths.append(path)
+    corpus = Corpus(paths, min_chars=30, read_workers=read_workers)
+    expected = [p for p in paths if len(p.read_text()) >= 30]
+    assert corpus.paths_ == expected
+    assert corpus.documents_ == [p.read_text() for p in expected]
 
 
 class TestCorpus:
@@ -118,7 +202,5 @@ class TestCorpus:
         corpus.add_from_file(temp_files[0])
         corpus.add_from_file(temp_files[1])
         corpus.add_from_file(temp_files[0], is_reference=True)
-        duplicates = set(
-            [x for x in corpus.documents_ if corpus.documents_.count(x) > 1]
-        )
+        duplicates = {x for x in corpus.documents_ if corpus.documents_.count(x) > 1}
         assert len(duplicates) == 0
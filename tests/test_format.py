@@ -1,7 +1,9 @@
+import json
+from pathlib import Path
+
 import pytest
+
 from findlike.format import BaseFormatter, JsonFormatter
-from pathlib import Path
-import json
 
 # Sample test data
 targets = [Path("file1.txt"), Path("file2.txt"), Path("file3.txt")]
@@ -78,3 +80,9 @@ class TestJsonFormatter:
         output = formatter.format()
         data = json.loads(output)
         assert len(data) == 2
+
+
+def test_ties_keep_original_order():
+    tied_targets = [Path(f"file{i}.txt") for i in range(5)]
+    formatter = BaseFormatter(tied_targets, [0.5, 0.7, 0.5, 0.7, 0.5], max_results=3)
+    assert formatter.format().split("\n") == ["file1.txt", "file3.txt", "file0.txt"]
@@ -0,0 +1,65 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.sparse import load_npz
+from scipy.sparse import random as sparse_random
+from sklearn.preprocessing import normalize
+
+from findlike.graph import similarity_graph, write_graph
+from findlike.utils import top_k
+
+
+@pytest.fixture
+def embeddings():
+    matrix = sparse_random(30, 50, density=0.1, format="csr", random_state=0)
+    return normalize(matrix)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 1024])
+def test_similarity_graph(embeddings, block_size):
+    dense = (embeddings @ embeddings.T).toarray()
+    np.fill_diagonal(dense, 0)
+    graph = list(
+        similarity_graph(
+            embeddings, max_neighbors=3, threshold=0.1, block_size=block_size
+        )
+    )
+    assert [row for row, _, _ in graph] == list(range(30))
+    for row, neighbors, scores in graph:
+        expected = top_k(dense[row], 3, threshold=0.1)
+        expected = [i for i in expected if dense[row, i] > 0]
+        assert sorted(neighbors.tolist()) == sorted(expected)
+        assert np.allclose(scores, dense[row, neighbors])
+        assert row not in neighbors
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl", ".npz"])
+def test_write_graph(tmp_path, embeddings, suffix):
+    paths = [Path(f"doc{i}.txt") for i in range(30)]
+    output = tmp_path / f"graph{suffix}"
+    graph = list(similarity_graph(embeddings, max_neighbors=2))
+    write_graph(iter(graph), paths=paths, output=output)
+    n_edges = sum(len(neighbors) for _, neighbors, _ in graph)
+
+    if suffix == ".csv":
+        with output.open() as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["source", "target", "score"]
+        assert len(rows) == n_edges + 1
+    elif suffix == ".jsonl":
+        edges = [json.loads(line) for line in output.read_text().splitlines()]
+        assert len(edges) == n_edges
+        assert set(edges[0]) == {"source", "target", "score"}
+    else:
+        matrix = load_npz(output)
+        assert matrix.shape == (30, 30)
+        assert matrix.nnz == n_edges
+        assert np.load(output)["paths"].tolist() == [str(p) for p in paths]
+
+
+def test_write_graph_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_graph(iter([]), paths=[], output=tmp_path / "graph.txt")
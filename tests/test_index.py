@@ -0,0 +1,255 @@
+import json
+
+import numpy as np
+import pytest
+from nltk.stem import SnowballStemmer
+from stop_words import get_stop_words
+
+from findlike.index import Index
+from findlike.preprocessing import Corpus, Processor
+
+settings = {"language": "english"}
+
+
+@pytest.fixture
+def processor():
+    stemmer = SnowballStemmer("english").stem
+    return Processor(stopwords=get_stop_words("english"), stemmer=stemmer)
+
+
+@pytest.fixture
+def corpus():
+    return Corpus([], min_chars=10)
+
+
+@pytest.fixture
+def sample_paths(tmp_path):
+    contents = [
+        "Cats are running in the garden.",
+        "Too short",
+        "The garden has dogs and cats.",
+    ]
+    paths = []
+    for i, content in enumerate(contents):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(content)
+        paths.append(path)
+    return paths
+
+
+def test_first_update(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+
+    assert index.paths_ == [sample_paths[0], sample_paths[2]]
+    assert index.counts_.shape == (2, len(index.vocabulary_))
+    assert index.frequencies_[index.vocabulary_["cat"]] == 2
+    assert index.frequencies_[index.vocabulary_["run"]] == 1
+    assert not index.update(sample_paths, corpus=corpus, processor=processor)
+
+
+def test_update_in_batches(tmp_path, sample_paths, corpus, processor):
+    index = Index(None, settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    batched = Index(None, settings, buffer_size=1)
+    batched.update(iter(sample_paths), corpus=corpus, processor=processor)
+
+    assert batched.paths_ == index.paths_
+    assert batched.vocabulary_ == index.vocabulary_
+    assert (batched.counts_ != index.counts_).nnz == 0
+    assert (batched.frequencies_ == index.frequencies_).all()
+
+
+def test_hashed_terms(tmp_path, sample_paths, corpus, processor):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    index = Index(tmp_path / "index", settings, n_features=64)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    assert index.vocabulary_ == {}
+    hasher = HashingVectorizer(
+        analyzer=processor.analyze, n_features=64, alternate_sign=False, norm=None
+    )
+    expected = hasher.transform([p.read_text() for p in index.paths_])
+    assert (index.counts_ != expected).nnz == 0
+    assert (index.frequencies_ == np.bincount(expected.indices, minlength=64)).all()
+
+    counts, vocabulary = index.with_document("Birds and cats", processor)
+    assert counts.shape == (3, 64) and vocabulary == {}
+
+    sample_paths[0].unlink()
+    assert index.update(sample_paths[1:], corpus=corpus, processor=processor)
+    assert index.counts_.shape == (1, 64)
+    index.save()
+    loaded = Index(tmp_path / "index", settings, n_features=64)
+    assert loaded.load()
+    assert (loaded.counts_ != index.counts_).nnz == 0
+
+
+def is_memory_mapped(array: np.ndarray) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def test_save_and_load(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    index.save()
+
+    loaded = Index(tmp_path / "index", settings)
+    assert loaded.load()
+    assert loaded.paths_ == index.paths_
+    assert loaded.vocabulary_ == index.vocabulary_
+    assert (loaded.counts_ != index.counts_).nnz == 0
+    assert is_memory_mapped(loaded.counts_.data)
+    assert loaded.generation_ == index.generation_
+    assert not loaded.update(sample_paths, corpus=corpus, processor=processor)
+
+    # Saving replaces the files that the loaded index maps.
+    sample_paths[0].unlink()
+    assert loaded.update(sample_paths[1:], corpus=corpus, processor=processor)
+    loaded.save()
+    assert loaded.generation_ != index.generation_
+    reloaded = Index(tmp_path / "index", settings)
+    assert reloaded.load()
+    assert reloaded.paths_ == [sample_paths[2]]
+    assert (reloaded.counts_ != loaded.counts_).nnz == 0
+
+
+def test_save_generations(tmp_path, sample_paths, corpus, processor):
+    directory = tmp_path / "index"
+    index = Index(directory, settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    index.save()
+    first_manifest = (directory / "manifest.json").read_text()
+
+    sample_paths[0].unlink()
+    index.update(sample_paths[1:], corpus=corpus, processor=processor)
+    index.save()
+    assert sorted(p.name for p in directory.iterdir()) == [
+        f"gen-{index.generation_}",
+        "manifest.json",
+    ]
+
+    # A manifest is never paired with the arrays of another generation.
+    (directory / "manifest.json").write_text(first_manifest)
+    assert not Index(directory, settings).load()
+
+
+@pytest.mark.parametrize("field", ["lines", "digests", "vocabulary"])
+def test_load_mismatched_manifest(tmp_path, sample_paths, corpus, processor, field):
+    directory = tmp_path / "index"
+    index = Index(directory, settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    index.save()
+
+    manifest = json.loads((directory / "manifest.json").read_text())
+    manifest[field] = manifest[field][:-1]
+    (directory / "manifest.json").write_text(json.dumps(manifest))
+    assert not Index(directory, settings).load()
+
+
+def test_load_with_other_settings(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    index.save()
+
+    assert not Index(tmp_path / "index", {"language": "french"}).load()
+    assert not Index(tmp_path / "missing", settings).load()
+
+
+def test_with_document(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+
+    assert index.contains("The garden has dogs and cats.")
+    counts, vocabulary = index.with_document("Birds and cats", processor)
+    assert counts.shape == (3, len(vocabulary))
+    assert "bird" in vocabulary and "bird" not in index.vocabulary_
+    assert counts[2, vocabulary["cat"]] == 1
+
+
+def test_update(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    assert not index.update(sample_paths, corpus=corpus, processor=processor)
+
+    new_path = tmp_path / "doc3.txt"
+    new_path.write_text("Birds are singing in the garden.")
+    sample_paths[0].write_text("Cats are sleeping.")
+    paths = [*sample_paths[1:], new_path]
+
+    read_paths = []
+    read_sections = corpus.read_sections
+
+    def tracking_read(path):
+        read_paths.append(path)
+        return read_sections(path)
+
+    corpus.read_sections = tracking_read
+    assert index.update(paths, corpus=corpus, processor=processor)
+    assert read_paths == [new_path]
+
+    expected = Index(tmp_path / "expected", settings)
+    expected.update(paths, corpus=Corpus([], min_chars=10), processor=processor)
+    assert index.paths_ == [sample_paths[2], new_path]
+    for term, column in expected.vocabulary_.items():
+        assert (
+            index.frequencies_[index.vocabulary_[term]]
+            == (expected.frequencies_[column])
+        )
+    assert index.frequencies_.sum() == expected.frequencies_.sum()
+
+
+def test_partial_update(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    index.save()
+    assert index.generation_
+
+    new_path = tmp_path / "doc3.txt"
+    new_path.write_text("Birds are singing in the garden.")
+    sample_paths[0].unlink()
+    assert index.update(
+        [sample_paths[0], new_path], corpus=corpus, processor=processor, partial=True
+    )
+    assert index.paths_ == [sample_paths[2], new_path]
+    assert index.generation_ == ""
+
+
+def test_update_unchanged_content(tmp_path, sample_paths, corpus, processor):
+    index = Index(tmp_path / "index", settings)
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    counts = index.counts_.copy()
+
+    sample_paths[0].write_text(sample_paths[0].read_text())
+    index.update(sample_paths, corpus=corpus, processor=processor)
+    assert index.paths_ == [sample_paths[0], sample_paths[2]]
+    assert (index.counts_ != counts).nnz == 0
+
+
+def test_update_sections(tmp_path, processor):
+    from findlike.sections import make_splitter
+
+    corpus = Corpus([], min_chars=1, splitter=make_splitter("headings"))
+    paths = [tmp_path / "a.md", tmp_path / "b.md"]
+    paths[0].write_text("# Cats\nCats are running.\n# Dogs\nDogs are barking.\n")
+    paths[1].write_text("# Birds\nBirds are singing.\n")
+    index = Index(tmp_path / "index", settings)
+    index.update(paths, corpus=corpus, processor=processor)
+    assert index.paths_ == [paths[0], paths[0], paths[1]]
+    assert index.lines_ == [(1, 2), (3, 4), (1, 2)]
+
+    paths[0].write_text("# Fish\nFish are swimming.\n")
+    assert index.update(paths, corpus=corpus, processor=processor)
+    assert index.paths_ == [paths[1], paths[0]]
+    assert index.lines_ == [(1, 2), (1, 2)]
+    assert index.counts_.shape[0] == 2
+    assert index.frequencies_[index.vocabulary_["cat"]] == 0
+
+    index.save()
+    loaded = Index(tmp_path / "index", settings)
+    assert loaded.load()
+    assert loaded.lines_ == index.lines_
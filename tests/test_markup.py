@@ -1,6 +1,16 @@
-from findlike.markup import Markup
 from textwrap import dedent
 
+import pytest
+
+from findlike import markup
+from findlike.markup import (
+    Markup,
+    blank_front_matter,
+    get_stripper,
+    register_stripper,
+    strip_front_matter,
+)
+
 
 class TestMarkup:
     def test_remove_org_front_matter(self):
@@ -31,3 +41,97 @@ class TestMarkup:
         content = "This is some text.\n** A heading\nSome more text."
         expected = "This is some text.\n** A heading\nSome more text."
         assert markup.strip_frontmatter(content) == expected
+
+    def test_remove_org_front_matter_inline_and_unclosed_drawers(self):
+        content = "a :PROPERTIES: x\ny :END: b\n\n  #+KEY: v\nc :PROPERTIES: z"
+        assert strip_front_matter(content, ".org") == "a  b\n\nc :PROPERTIES: z"
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("---\ntitle: Example\ntags: [a]\n---\n# Text\n", "# Text"),
+        ("---\ntitle: Example\n...\nText", "Text"),
+        ("+++\ntitle = 'Example'\n+++\n\nText\n", "Text"),
+        ("---\ntitle: Example\nText without closing line", None),
+        ("Text\n---\nMore text\n---\n", None),
+    ],
+)
+def test_strip_markdown(content, expected):
+    expected = content.strip() if expected is None else expected
+    assert strip_front_matter(content, ".md") == expected
+    assert Markup(extension=".markdown").strip_frontmatter(content) == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (":Author: Jane\n:Date: 2023\n\nText", "Text"),
+        (
+            (
+                "=====\nTitle\n=====\n\n"
+                ":Author: Jane\n:Abstract: Long\n   abstract\n\nText"
+            ),
+            "=====\nTitle\n=====\n\n\nText",
+        ),
+        ("Title\n=====\n:orphan:\nText", "Title\n=====\nText"),
+        ("Title\n=====\n\nText :role:`x`.", "Title\n=====\n\nText :role:`x`."),
+    ],
+)
+def test_strip_rst(content, expected):
+    assert strip_front_matter(content, ".rst") == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (
+            (
+                "\\documentclass{article}\n\\usepackage{amsmath}\n"
+                "\\begin{document}\nText\n\\end{document}\n"
+            ),
+            "Text",
+        ),
+        (
+            (
+                "% \\begin{document} in a comment\n\\title{50\\% off}\n"
+                "\\begin{document}\nText\n"
+            ),
+            "Text",
+        ),
+        ("\\section{Chapter}\nText", "\\section{Chapter}\nText"),
+    ],
+)
+def test_strip_latex(content, expected):
+    assert strip_front_matter(content, ".tex") == expected
+
+
+@pytest.mark.parametrize(
+    "content, extension, expected",
+    [
+        ("---\ntitle: A\n---\nText\nMore", ".md", "\n\n\nText\nMore"),
+        ("* A :PROPERTIES:\n:ID: 1\n:END: b\nText", ".org", "* A  b\n\n\nText"),
+        ("\\usepackage{x}\n\\begin{document} Text", ".tex", "\nText"),
+        ("Text", ".xyz", "Text"),
+    ],
+)
+def test_blank_front_matter(content, extension, expected):
+    blanked = blank_front_matter(content, extension)
+    assert blanked == expected
+    assert blanked.count("\n") == content.count("\n")
+
+
+def test_register_stripper():
+    assert get_stripper(".xyz") is None
+    assert strip_front_matter(" text ", ".xyz") == " text "
+
+    @register_stripper(".xyz")
+    def strip_xyz(text):
+        return text.strip()
+
+    try:
+        assert get_stripper(".XYZ") is strip_xyz
+        assert strip_front_matter(" text ", ".xyz") == "text"
+    finally:
+        del markup._STRIPPERS[".xyz"]
+        get_stripper.cache_clear()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from nltk.stem import SnowballStemmer
+from stop_words import get_stop_words
+
+from findlike import profiling
+from findlike.parallel import count_tokens, hash_documents, tokenize_documents
+from findlike.preprocessing import Processor
+
+documents = [
+    "Cats are running in the garden.",
+    "",
+    "The garden has dogs and cats.",
+    "Dogs are running after cats.",
+    "Birds are singing.",
+]
+
+
+@pytest.fixture
+def processor():
+    stemmer = SnowballStemmer("english").stem
+    return Processor(stopwords=get_stop_words("english"), stemmer=stemmer)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_tokenize_documents(processor, jobs):
+    token_ids, vocabulary = tokenize_documents(processor, documents, jobs=jobs)
+    terms = {i: t for t, i in vocabulary.items()}
+
+    assert len(token_ids) == len(documents)
+    for ids, document in zip(token_ids, documents):
+        expected = processor.analyze(document)
+        assert [terms[i] for i in ids] == expected
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_tokenize_documents_profile(processor, jobs):
+    profiler = profiling.enable()
+    try:
+        with profiling.stage("tokenize"):
+            tokenize_documents(processor, documents, jobs=jobs)
+    finally:
+        profiling.disable()
+    stats = profiler.stages[0]
+    assert stats["stem_hits"] + stats["stem_misses"] == stats["tokens"]
+    assert stats["stem_misses"] > 0
+
+
+def test_hash_documents(processor):
+    serial = hash_documents(processor, documents, n_features=32)
+    parallel = hash_documents(processor, documents, n_features=32, jobs=2)
+    assert serial.shape == (len(documents), 32)
+    assert (serial != parallel).nnz == 0
+    assert serial[1].nnz == 0
+
+
+def test_count_tokens():
+    token_ids = [np.array([0, 1, 0]), np.array([], dtype=np.uint32), np.array([2])]
+    counts = count_tokens(token_ids, n_terms=4)
+    assert counts.shape == (3, 4)
+    assert counts.toarray().tolist() == [[2, 1, 0, 0], [0, 0, 0, 0], [0, 0, 1, 0]]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_tokenize_documents_shared_vocabulary(processor, jobs):
+    vocabulary = {"bird": 0, "garden": 1}
+    token_ids, result = tokenize_documents(
+        processor, documents, jobs=jobs, vocabulary=vocabulary
+    )
+    assert result is vocabulary
+    assert vocabulary["bird"] == 0 and vocabulary["garden"] == 1
+    assert sorted(vocabulary.values()) == list(range(len(vocabulary)))
+    assert all(ids.dtype == np.uint32 for ids in token_ids)
+    assert token_ids[0][-1] == vocabulary["garden"]
@@ -1,8 +1,11 @@
+from pathlib import Path
+
 import pytest
 from nltk.stem import SnowballStemmer
-from findlike.preprocessing import Processor
 from stop_words import get_stop_words
 
+from findlike.preprocessing import Processor, StemCache
+
 
 @pytest.fixture
 def processor():
@@ -72,3 +75,93 @@ def test_text_with_unicode_characters(processor):
     processed_text = processor.preprocessor(text)
     tokens = processor.tokenizer(processed_text)
     assert tokens == ["café", "naïv"]
+
+
+def test_stem_cache(processor):
+    cache = processor.stem_cache
+    assert processor._stemmize(["cats", "cats", "running"]) == ["cat", "cat", "run"]
+    assert cache.misses_ == 2
+    assert cache.hits_ == 1
+    assert cache.hit_rate == pytest.approx(1 / 3)
+
+
+def test_stem_cache_eviction():
+    cache = StemCache(SnowballStemmer("english").stem, max_size=2)
+    cache.stem(["cats", "dogs"])
+    cache.stem(["cats", "birds"])
+    assert len(cache) == 2
+    cache.stem(["cats"])
+    assert cache.hits_ == 2
+    cache.stem(["dogs"])
+    assert cache.misses_ == 4
+
+
+def test_stem_cache_persistence(tmp_path):
+    stemmer = SnowballStemmer("english").stem
+    cache = StemCache(stemmer)
+    cache.stem(["running", "cats"])
+    cache.save(tmp_path / "stems.json")
+
+    loaded = StemCache(stemmer)
+    loaded.load(tmp_path / "stems.json")
+    assert loaded.stem(["running", "cats"]) == ["run", "cat"]
+    assert loaded.hits_ == 2
+
+
+@pytest.mark.parametrize("content", [None, '{"running": "ru', "[]"])
+def test_stem_cache_load_invalid(tmp_path, content):
+    path = tmp_path / "stems.json"
+    if content is not None:
+        path.write_text(content)
+    cache = StemCache(SnowballStemmer("english").stem)
+    cache.load(path)
+    assert len(cache) == 0
+    assert cache.stem(["running"]) == ["run"]
+
+
+def test_without_stem_cache():
+    stemmer = SnowballStemmer("english").stem
+    processor = Processor(
+        stopwords=get_stop_words("english"), stemmer=stemmer, stem_cache_size=0
+    )
+    assert processor.stem_cache is None
+    assert processor._stemmize(["running", "cats"]) == ["run", "cat"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "There’s a URL https://example.com in this text.",
+        "Don't you think it's a test? They aren't here.",
+        "#This is a test! @user #hashtag",
+        "There are 100 cats",
+        "café naïve",
+        "",
+    ],
+)
+def test_analyze(processor, text):
+    assert processor.analyze(text) == processor.tokenizer(processor.preprocessor(text))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        # Contractions that are stopwords are removed whole.
+        ("You're right.", ["right"]),
+        ("We've done it and we'll see.", ["done", "see"]),
+        # The URL is removed before the stopwords.
+        ("See http://x.com/the dog", ["see", "dog"]),
+    ],
+)
+def test_analyze_differences(processor, text, expected):
+    assert processor.analyze(text) == expected
+    assert processor.tokenizer(processor.preprocessor(text)) != expected
+
+
+def test_analyze_fixtures(processor):
+    fixtures = Path(__file__).parent / "fixtures"
+    for path in fixtures.rglob("*.txt"):
+        text = path.read_text()
+        assert processor.analyze(text) == processor.tokenizer(
+            processor.preprocessor(text)
+        )
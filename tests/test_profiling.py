@@ -0,0 +1,40 @@
+import json
+
+from findlike import profiling
+
+
+def test_profiler_stages():
+    profiler = profiling.Profiler()
+    with profiler.stage("read"):
+        profiler.count(files_read=1, bytes_read=10)
+        profiler.count(files_read=1, bytes_read=5)
+    with profiler.stage("fit"):
+        profiler.record(vocabulary=3)
+        profiler.record(vocabulary=4)
+    profiler.count(files_read=1)  # Outside of a stage.
+
+    read, fit = profiler.stages
+    assert read["files_read"] == 2 and read["bytes_read"] == 15
+    assert fit["vocabulary"] == 4
+    assert read["wall_time"] >= 0 and read["cpu_time"] >= 0
+
+    assert json.loads(profiler.report("json")) == {"stages": profiler.stages}
+    lines = profiler.report("text").splitlines()
+    assert lines[0].startswith("read: wall ")
+    assert lines[0].endswith("files_read 2, bytes_read 15")
+
+
+def test_disabled_hooks():
+    profiling.disable()
+    assert not profiling.enabled()
+    with profiling.stage("scan") as stats:
+        profiling.count(files_read=1)
+    assert stats is None
+
+    profiler = profiling.enable()
+    try:
+        with profiling.stage("scan"):
+            profiling.count(files_read=1)
+    finally:
+        profiling.disable()
+    assert profiler.stages[0]["files_read"] == 1
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from findlike.preprocessing import Corpus
+from findlike.sections import FileSections, make_splitter, split_headings, split_windows
+
+document = """#+TITLE: Notes
+Introduction.
+* Cooking
+Tomato sauce.
+** Pasta
+Boil water.
+# Markdown heading
+Last line."""
+
+
+def test_split_headings():
+    sections = split_headings(document, ".org")
+    assert [(s.start, s.end) for s in sections] == [(1, 2), (3, 4), (5, 8)]
+    assert sections[1].text == "* Cooking\nTomato sauce.\n"
+    assert "".join(s.text for s in sections) == document
+
+
+def test_split_markdown_headings():
+    groceries = "# Groceries\n\n* apples\n* pears\n* milk\n"
+    assert split_headings(groceries, ".md") == [(groceries, 1, 5)]
+    sections = split_headings(groceries + "## Chores\n* laundry\n", ".markdown")
+    assert [(s.start, s.end) for s in sections] == [(1, 5), (6, 7)]
+
+
+@pytest.mark.parametrize("extension", [".txt", ".py", ".sh"])
+def test_split_headings_other_formats(extension):
+    text = "# Comment\nx = 1\n* not a heading\n"
+    assert split_headings(text, extension) == [(text, 1, 4)]
+
+
+def test_split_headings_without_headings():
+    assert split_headings("Just text.\nMore text.", ".md") == [
+        ("Just text.\nMore text.", 1, 2)
+    ]
+
+
+def test_split_windows():
+    text = "one two\nthree four five\n\nsix seven"
+    sections = split_windows(text, size=3, overlap=1)
+    assert [s.text for s in sections] == [
+        "one two\nthree",
+        "three four five",
+        "five\n\nsix seven",
+    ]
+    assert [(s.start, s.end) for s in sections] == [(1, 2), (2, 2), (2, 4)]
+    assert len(split_windows(text, size=10, overlap=5)) == 1
+    with pytest.raises(ValueError):
+        split_windows(text, size=3, overlap=3)
+
+
+def test_max_pool():
+    paths = [Path("a"), Path("a"), Path("b"), Path("c"), Path("b")]
+    lines = [(1, 2), (3, 4), (1, 9), (1, 1), (10, 12)]
+    file_sections = FileSections(paths, lines)
+    # The last score belongs to an appended reference and is ignored.
+    scores, best = file_sections.max_pool(np.array([0.2, 0.5, 0.1, 0.0, 0.7, 1.0]))
+    assert file_sections.files == [Path("a"), Path("b"), Path("c")]
+    assert scores.tolist() == [0.5, 0.7, 0.0]
+    assert best == [(3, 4), (10, 12), (1, 1)]
+
+
+def test_corpus_sections(tmp_path):
+    path = tmp_path / "notes.org"
+    path.write_text(document)
+    corpus = Corpus(
+        [path],
+        min_chars=1,
+        ignore_front_matter=True,
+        splitter=make_splitter("headings"),
+    )
+    assert corpus.paths_ == [path] * 3
+    assert corpus.lines_ == [(1, 2), (3, 4), (5, 8)]
+    # The front matter is stripped without shifting the line ranges.
+    assert corpus.documents_[0].strip() == "Introduction."
+
+
+@pytest.mark.parametrize(
+    "name, front_matter",
+    [
+        (
+            "notes.md",
+            "---\n" + "".join(f"key{i}: value{i}\n" for i in range(20)) + "---\n",
+        ),
+        (
+            "notes.tex",
+            "\\documentclass{article}\n"
+            + "".join(f"\\usepackage{{package{i}}}\n" for i in range(30))
+            + "\\begin{document}\n",
+        ),
+        ("notes.org", "* Heading\n:PROPERTIES:\n" + ":KEY: value\n" * 20 + ":END:\n"),
+    ],
+)
+def test_corpus_windows_front_matter(tmp_path, name, front_matter):
+    path = tmp_path / name
+    body = "\n".join(f"word{i} word{i}" for i in range(20))
+    path.write_text(front_matter + body)
+    corpus = Corpus(
+        [path],
+        min_chars=1,
+        ignore_front_matter=True,
+        splitter=make_splitter("window", size=10, overlap=0),
+    )
+    # The front matter is stripped from the whole document before it is
+    # split, even if it spans several windows.
+    text = " ".join(corpus.documents_)
+    for term in ["key", "package", "KEY", "PROPERTIES", "END"]:
+        assert term not in text
+    first_line = front_matter.count("\n") + 1
+    if name == "notes.org":
+        # The heading is kept, and its two words start the first window.
+        assert corpus.lines_[0] == (1, first_line + 3)
+    else:
+        assert corpus.lines_[0] == (first_line, first_line + 4)
+    assert corpus.lines_[-1][1] == first_line + 19
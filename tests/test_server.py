@@ -0,0 +1,86 @@
+import json
+import threading
+
+import pytest
+from nltk.stem import SnowballStemmer
+from stop_words import get_stop_words
+
+from findlike.preprocessing import Corpus, Processor
+from findlike.server import Server, request
+from findlike.wrappers import Tfidf
+
+settings = {"language": "english"}
+
+
+@pytest.fixture
+def server(tmp_path):
+    documents = {
+        "cats.txt": "Cats are sleeping in the garden.",
+        "dogs.txt": "Dogs are barking in the street.",
+    }
+    for name, content in documents.items():
+        (tmp_path / name).write_text(content)
+    paths = sorted(tmp_path.glob("*.txt"))
+    corpus = Corpus(paths, min_chars=1)
+
+    stemmer = SnowballStemmer("english").stem
+    processor = Processor(stopwords=get_stop_words("english"), stemmer=stemmer)
+    model = Tfidf(processor=processor)
+    model.fit(corpus.documents_)
+
+    server = Server(
+        tmp_path / "findlike.sock",
+        model=model,
+        targets=corpus.paths_,
+        corpus=Corpus([], min_chars=1),
+        directory=tmp_path,
+        settings=settings,
+    )
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def make_request(**kwargs):
+    payload = {
+        "settings": settings,
+        "reference_file": None,
+        "query": "sleeping cats",
+        "directory": "notes",
+        "format": "json",
+        "formatter": {"show_scores": True},
+    }
+    payload.update(kwargs)
+    return payload
+
+
+def test_query(server):
+    response = request(server.socket_path, make_request())
+    results = json.loads(response["output"])
+    assert results[0]["target"] == "notes/cats.txt"
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_reference_file(server, tmp_path):
+    reference = tmp_path / "dogs.txt"
+    response = request(server.socket_path, make_request(reference_file=str(reference)))
+    results = json.loads(response["output"])
+    assert results[0] == {"score": 1.0, "target": "notes/dogs.txt"}
+
+
+def test_unreadable_reference_file(server, tmp_path):
+    reference = tmp_path / "missing.txt"
+    response = request(server.socket_path, make_request(reference_file=str(reference)))
+    assert "could not be read as text" in response["error"]
+
+
+def test_settings_mismatch(server):
+    response = request(server.socket_path, make_request(settings={}))
+    assert "error" in response
+
+
+def test_no_server(tmp_path):
+    assert request(tmp_path / "missing.sock", make_request()) is None
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from findlike.utils import collect_paths, map_ordered, top_k
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 5, 10])
+def test_top_k_matches_stable_sort(k):
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 5, size=50) / 4
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    assert top_k(scores, k).tolist() == expected[:k]
+
+
+def test_top_k_threshold():
+    scores = np.array([0.8, 0.6, 0.9, 0.1])
+    assert top_k(scores, 10, threshold=0.6).tolist() == [2, 0, 1]
+    assert top_k(scores, 10, threshold=1.0).tolist() == []
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_map_ordered(workers):
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = map_ordered(lambda x: x * 2, items(), workers=workers)
+    assert next(results) == 0
+    # The items are consumed lazily.
+    assert len(consumed) <= 2 * workers
+    assert list(results) == [2 * i for i in range(1, 100)]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    files = [
+        "notes.md",
+        "todo.txt",
+        "image.png",
+        ".bashrc",
+        "sub/deep.md",
+        "sub/build/output.txt",
+        ".git/config.txt",
+        "node_modules/pkg/readme.md",
+        "logs/app.log",
+        "logs/keep.log",
+    ]
+    for name in files:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    return tmp_path
+
+
+def relative_paths(directory, **kwargs):
+    paths = collect_paths(directory, **kwargs)
+    return sorted(p.relative_to(directory).as_posix() for p in paths)
+
+
+def test_collect_paths(tree):
+    patterns = ["*.md", "*.txt", "*.bashrc", "notes.*"]
+    assert relative_paths(tree, extensions=patterns) == [
+        ".bashrc",
+        "notes.md",
+        "todo.txt",
+    ]
+    assert relative_paths(tree, extensions=["*.md"], recursive=True) == [
+        "node_modules/pkg/readme.md",
+        "notes.md",
+        "sub/deep.md",
+    ]
+    assert relative_paths(tree, extensions=["sub/*.md"]) == ["sub/deep.md"]
+
+
+def test_collect_paths_matches_glob(tree):
+    patterns = ["*.md", "*.txt", "*.log", "*.png"]
+    expected = {p for pattern in patterns for p in tree.rglob(pattern)}
+    paths = collect_paths(tree, extensions=patterns, recursive=True)
+    assert len(paths) == len(set(paths))
+    assert set(paths) == expected
+
+
+def test_collect_paths_exclude(tree):
+    paths = relative_paths(
+        tree,
+        extensions=["*.md", "*.txt"],
+        recursive=True,
+        exclude=[".git", "node_modules", "sub/build"],
+    )
+    assert paths == ["notes.md", "sub/deep.md", "todo.txt"]
+
+
+def test_collect_paths_gitignore(tree):
+    (tree / ".gitignore").write_text("# Comment\n*.log\n!keep.log\n/build/\nimage.*\n")
+    (tree / "sub" / ".gitignore").write_text("build/\n")
+    paths = relative_paths(
+        tree,
+        extensions=["*.md", "*.txt", "*.log", "*.png"],
+        recursive=True,
+        exclude=[".git", "node_modules"],
+        gitignore=True,
+    )
+    assert paths == ["logs/keep.log", "notes.md", "sub/deep.md", "todo.txt"]
@@ -0,0 +1,76 @@
+import threading
+
+from findlike.watch import Watcher
+
+
+def test_changes(tmp_path):
+    (tmp_path / "a.txt").write_text("First file.")
+    watcher = Watcher(
+        scan=lambda: sorted(tmp_path.glob("*.txt")), interval=0.01, debounce=0.05
+    )
+    timer = threading.Timer(0.1, (tmp_path / "b.txt").write_text, ["Second file."])
+    timer.start()
+    changes = watcher.changes()
+    paths = next(changes)
+    timer.join()
+    assert paths == [tmp_path / "b.txt"]
+
+    timer = threading.Timer(0.1, (tmp_path / "a.txt").unlink)
+    timer.start()
+    paths = next(changes)
+    timer.join()
+    assert paths == [tmp_path / "a.txt"]
+
+
+def test_scan_only_when_directories_change(tmp_path):
+    (tmp_path / "a.txt").write_text("First file.")
+    scans = []
+
+    def scan():
+        scans.append(None)
+        return sorted(tmp_path.glob("*.txt"))
+
+    watcher = Watcher(scan=scan, interval=0.01, debounce=0.05)
+    timer = threading.Timer(0.1, (tmp_path / "a.txt").write_text, ["Modified."])
+    timer.start()
+    changes = watcher.changes()
+    paths = next(changes)
+    timer.join()
+    # Modifying a file does not change its directory.
+    assert paths == [tmp_path / "a.txt"]
+    assert len(scans) == 1
+
+    timer = threading.Timer(0.1, (tmp_path / "b.txt").write_text, ["Second file."])
+    timer.start()
+    assert next(changes) == [tmp_path / "b.txt"]
+    timer.join()
+    assert len(scans) > 1
+
+
+def test_new_subdirectory(tmp_path):
+    def create_file():
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "a.txt").write_text("First file.")
+
+    watcher = Watcher(
+        scan=lambda: sorted(tmp_path.rglob("*.txt")),
+        directories=[tmp_path],
+        interval=0.01,
+        debounce=0.05,
+    )
+    timer = threading.Timer(0.1, create_file)
+    timer.start()
+    paths = next(watcher.changes())
+    timer.join()
+    assert paths == [tmp_path / "sub" / "a.txt"]
+
+
+def test_extra_paths(tmp_path):
+    reference = tmp_path / "reference.md"
+    reference.write_text("Reference.")
+    watcher = Watcher(scan=list, extra_paths=[reference], interval=0.01, debounce=0.05)
+    timer = threading.Timer(0.1, reference.write_text, ["Modified reference."])
+    timer.start()
+    paths = next(watcher.changes())
+    timer.join()
+    assert paths == []
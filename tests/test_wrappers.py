@@ -0,0 +1,194 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from findlike.wrappers import (
+    BM25,
+    BM25L,
+    ApproximateTfidf,
+    BM25Plus,
+    HashedTfidf,
+    Tfidf,
+)
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+DOCUMENTS = [
+    "the quick brown fox jumps over the lazy dog",
+    "the lazy dog sleeps all day long",
+    "a quick brown dog outpaces a quick fox",
+    "foxes and dogs are not the same animal",
+    "nothing in common here",
+    "the the the the",
+]
+
+QUERIES = ["quick fox", "lazy dog dog", "the", "unknown words only"]
+
+
+class SplitProcessor:
+    def analyze(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def tokenized():
+    return [d.split() for d in DOCUMENTS]
+
+
+def test_bm25_matches_rank_bm25(tokenized):
+    model = BM25(processor=SplitProcessor())
+    model.fit(DOCUMENTS)
+    reference = rank_bm25.BM25Okapi(tokenized)
+    for query in QUERIES:
+        expected = reference.get_scores(query.split())
+        np.testing.assert_allclose(model.get_scores(query), expected)
+
+
+def test_bm25plus_formula(tokenized):
+    # Unlike rank_bm25, `delta` is only added for the terms that a document
+    # contains.
+    model = BM25Plus(processor=SplitProcessor(), k1=1.2, b=0.5, delta=1.0)
+    model.fit(DOCUMENTS)
+    lengths = np.array([len(d) for d in tokenized])
+    norms = 1 - 0.5 + 0.5 * lengths / lengths.mean()
+    n = len(tokenized)
+    expected = np.zeros(n)
+    for term in ["quick", "fox"]:
+        tf = np.array([d.count(term) for d in tokenized])
+        idf = np.log((n + 1) / (tf > 0).sum())
+        weight = 1.0 + tf * 2.2 / (1.2 * norms + tf)
+        expected += np.where(tf > 0, idf * weight, 0)
+    np.testing.assert_allclose(model.get_scores("quick fox"), expected)
+
+
+def test_bm25l_formula(tokenized):
+    model = BM25L(processor=SplitProcessor(), k1=1.2, b=0.5, delta=0.5)
+    model.fit(DOCUMENTS)
+    lengths = np.array([len(d) for d in tokenized])
+    norms = 1 - 0.5 + 0.5 * lengths / lengths.mean()
+    n = len(tokenized)
+    expected = np.zeros(n)
+    for term in ["lazy", "dog"]:
+        tf = np.array([d.count(term) for d in tokenized])
+        idf = np.log(n + 1) - np.log((tf > 0).sum() + 0.5)
+        shifted = tf / norms + 0.5
+        expected += np.where(tf > 0, idf * 2.2 * shifted / (1.2 + shifted), 0)
+    np.testing.assert_allclose(model.get_scores("lazy dog"), expected)
+
+
+@pytest.mark.parametrize("algorithm", [BM25, BM25L, BM25Plus, Tfidf])
+def test_scoring_methods_agree(algorithm):
+    model = algorithm(processor=SplitProcessor())
+    model.fit(DOCUMENTS)
+    batch = model.get_scores_batch(DOCUMENTS[:3])
+    documents = model.get_document_scores([0, 1, 2])
+    np.testing.assert_allclose(batch, documents)
+    np.testing.assert_allclose(batch[1], model.get_scores(DOCUMENTS[1]))
+
+
+def test_fit_counts_matches_fit():
+    vectorizer = CountVectorizer(analyzer=str.split)
+    counts = vectorizer.fit_transform(DOCUMENTS)
+    fitted = BM25(processor=SplitProcessor())
+    fitted.fit(DOCUMENTS)
+    from_counts = BM25(processor=SplitProcessor())
+    from_counts.fit_counts(counts, vectorizer.vocabulary_)
+    np.testing.assert_allclose(
+        from_counts.get_scores("quick fox"), fitted.get_scores("quick fox")
+    )
+
+
+def test_tfidf_matches_cosine_similarity():
+    model = Tfidf(processor=SplitProcessor(), norm=None)
+    model.fit(DOCUMENTS)
+    for query in QUERIES:
+        source = model._transformer.transform(model._vectorizer.transform([query]))
+        expected = cosine_similarity(source, model.target_embeddings_).ravel()
+        np.testing.assert_allclose(model.get_scores(query), expected)
+
+
+def test_hashed_tfidf_matches_tfidf():
+    # With many buckets, no terms collide and the scores are the same.
+    tfidf = Tfidf(processor=SplitProcessor())
+    tfidf.fit(DOCUMENTS)
+    hashed = HashedTfidf(processor=SplitProcessor(), n_features=2**20)
+    hashed.fit(DOCUMENTS)
+    assert hashed.target_embeddings_.shape == (len(DOCUMENTS), 2**20)
+    for query in QUERIES:
+        expected = tfidf.get_scores(query)
+        np.testing.assert_allclose(hashed.get_scores(query), expected)
+
+
+def test_hashed_tfidf_fit_counts_matches_fit():
+    vectorizer = CountVectorizer(analyzer=str.split)
+    counts = vectorizer.fit_transform(DOCUMENTS)
+    fitted = HashedTfidf(processor=SplitProcessor(), n_features=8)
+    fitted.fit(DOCUMENTS)
+    from_counts = HashedTfidf(processor=SplitProcessor(), n_features=8)
+    from_counts.fit_counts(counts, vectorizer.vocabulary_)
+    assert (fitted.target_embeddings_ != from_counts.target_embeddings_).nnz == 0
+
+
+def test_hashed_tfidf_jobs():
+    # Each worker hashes its chunk of documents without a vocabulary.
+    serial = HashedTfidf(processor=SplitProcessor(), n_features=64)
+    serial.fit(DOCUMENTS)
+    parallel = HashedTfidf(processor=SplitProcessor(), n_features=64, jobs=2)
+    parallel.fit(DOCUMENTS)
+    assert (serial.target_embeddings_ != parallel.target_embeddings_).nnz == 0
+
+
+@pytest.mark.parametrize("model_class", [Tfidf, HashedTfidf, ApproximateTfidf])
+def test_tfidf_save_and_load(tmp_path, model_class):
+    vectorizer = CountVectorizer(analyzer=str.split)
+    counts = vectorizer.fit_transform(DOCUMENTS)
+    fitted = model_class(processor=SplitProcessor())
+    fitted.fit_counts(counts, vectorizer.vocabulary_)
+    fitted.save(tmp_path, tag="a")
+
+    loaded = model_class(processor=SplitProcessor())
+    assert loaded.load(tmp_path, vectorizer.vocabulary_, tag="a")
+    # Mapped read-only.
+    assert not loaded._norms.flags.writeable
+    np.testing.assert_allclose(
+        loaded.get_scores_batch(QUERIES), fitted.get_scores_batch(QUERIES)
+    )
+
+    assert not loaded.load(tmp_path, vectorizer.vocabulary_, tag="b")
+    other = model_class(processor=SplitProcessor(), sublinear_tf=True)
+    assert not other.load(tmp_path, vectorizer.vocabulary_, tag="a")
+    assert not model_class(processor=SplitProcessor()).load(
+        tmp_path / "missing", vectorizer.vocabulary_, tag="a"
+    )
+
+    # Saving again writes a new generation and removes the previous one,
+    # which the loaded model keeps reading.
+    fitted.save(tmp_path, tag="b")
+    assert len(list(tmp_path.glob("gen-*"))) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+    np.testing.assert_allclose(
+        loaded.get_scores_batch(QUERIES), fitted.get_scores_batch(QUERIES)
+    )
+    assert loaded.load(tmp_path, vectorizer.vocabulary_, tag="b")
+
+
+def test_approximate_tfidf():
+    tfidf = Tfidf(processor=SplitProcessor())
+    tfidf.fit(DOCUMENTS)
+    expected = tfidf.get_scores_batch(QUERIES)
+
+    # Searching every cluster gives the exact scores.
+    exhaustive = ApproximateTfidf(processor=SplitProcessor(), n_lists=3, n_probes=3)
+    exhaustive.fit(DOCUMENTS)
+    np.testing.assert_allclose(exhaustive.get_scores_batch(QUERIES), expected)
+
+    model = ApproximateTfidf(processor=SplitProcessor(), n_lists=3, n_probes=1)
+    model.fit(DOCUMENTS)
+    assert len(model.centroids_) == 3
+    assert sorted(model.list_documents_) == list(range(len(DOCUMENTS)))
+    assert model.list_offsets_[-1] == len(DOCUMENTS)
+    # Documents outside the probed cluster score 0, the others are exact.
+    scores = model.get_scores_batch(QUERIES)
+    assert ((scores == 0) | np.isclose(scores, expected)).all()
+    np.testing.assert_allclose(model.get_scores(DOCUMENTS[0])[0], 1.0)